@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+Session HTTP partagée par les scripts de test de l'API
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def create_session() -> requests.Session:
+    """Crée une session keep-alive réutilisée par tous les appels d'un script"""
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4,
+                                         max_retries=Retry(total=2, backoff_factor=0.1)))
+    return session
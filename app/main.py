@@ -1,3 +1,4 @@
+import asyncio
 import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
@@ -9,6 +10,8 @@ from fastapi.responses import HTMLResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from loguru import logger
 import os
+import stat
+import uuid
 from pathlib import Path
 
 from .config import config_manager
@@ -23,16 +26,26 @@ async def lifespan(app: FastAPI):
     logger.info("Démarrage de l'application Photobooth...")
     
     # Créer les dossiers nécessaires
-    os.makedirs("logs", exist_ok=True)
-    os.makedirs("uploads", exist_ok=True)
+    for directory in ("logs", "uploads", "backups"):
+        os.makedirs(directory, exist_ok=True)
     
     # Vérifier la configuration
     if not config_manager.config:
         logger.error("Configuration non disponible, arrêt de l'application")
         raise RuntimeError("Configuration invalide")
     
+    # Précalculer les paramètres du cookie de session
+    auth.refresh_cookie_settings()
+    
+    # Initialiser le gestionnaire d'email
+    email.init_email_sender()
+    
+    # Initialiser le gestionnaire d'impression
+    printing.init_printer_manager()
+    
     logger.info(f"Application {config_manager.config.app.name} v{config_manager.config.app.version} démarrée")
     logger.info(f"Serveur configuré sur {config_manager.config.server.host}:{config_manager.config.server.port}")
+    logger.info(f"Boucle d'événements: {type(asyncio.get_running_loop()).__module__}")
     
     yield
     
@@ -335,6 +348,7 @@ async def admin_page():
 
 # Montage des fichiers statiques
 app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/admin/frames/file", StaticFiles(directory=frames.FRAMES_DIR), name="frame_files")
 
 
 # Route de test simple
@@ -381,21 +395,48 @@ async def status():
         }
 
 
+# Dossiers servis, résolus une seule fois au démarrage
+UPLOADS_ROOT = Path("uploads").resolve()
+FRAMES_ROOT = Path("frames").resolve()
+
+# Les cadres créés via l'API portent un nom UUID et ne sont jamais réécrits
+IMMUTABLE_CACHE_HEADERS = {"Cache-Control": "public, max-age=31536000, immutable"}
+
+
+def _stat_regular_file(file_path: Path):
+    """Retourne le stat d'un fichier régulier, ou None s'il n'existe pas"""
+    try:
+        file_stat = os.stat(file_path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return file_stat if stat.S_ISREG(file_stat.st_mode) else None
+
+
+def _has_uuid_name(file_path: Path) -> bool:
+    """Indique si le nom du fichier (sans extension) est un UUID"""
+    try:
+        uuid.UUID(file_path.stem)
+        return True
+    except ValueError:
+        return False
+
+
 # Route pour servir les photos uploadées
 @app.get("/uploads/{filename}")
 async def serve_uploaded_file(filename: str):
     """Sert les fichiers uploadés (photos)"""
     try:
-        file_path = Path("uploads") / filename
-        
-        # Vérifier que le fichier existe et est dans le dossier uploads
-        if not file_path.exists() or not file_path.is_file():
-            raise HTTPException(status_code=404, detail="Fichier non trouvé")
+        file_path = (UPLOADS_ROOT / filename).resolve()
         
         # Vérifier que le fichier est bien dans le dossier uploads (sécurité)
-        if not str(file_path.resolve()).startswith(str(Path("uploads").resolve())):
+        if not file_path.is_relative_to(UPLOADS_ROOT):
             raise HTTPException(status_code=400, detail="Chemin de fichier invalide")
         
+        # Vérifier que le fichier existe (un seul stat, réutilisé par FileResponse)
+        file_stat = _stat_regular_file(file_path)
+        if file_stat is None:
+            raise HTTPException(status_code=404, detail="Fichier non trouvé")
+        
         # Déterminer le type MIME
         content_type = "image/jpeg"  # Par défaut
         if filename.lower().endswith('.png'):
@@ -409,7 +450,8 @@ async def serve_uploaded_file(filename: str):
         return FileResponse(
             file_path,
             media_type=content_type,
-            filename=filename
+            filename=filename,
+            stat_result=file_stat
         )
         
     except HTTPException:
@@ -424,21 +466,24 @@ async def serve_uploaded_file(filename: str):
 async def serve_frame_file(filename: str):
     """Sert les fichiers des cadres"""
     try:
-        file_path = Path("frames") / filename
-        
-        # Vérifier que le fichier existe et est dans le dossier frames
-        if not file_path.exists() or not file_path.is_file():
-            raise HTTPException(status_code=404, detail="Fichier non trouvé")
+        file_path = (FRAMES_ROOT / filename).resolve()
         
         # Vérifier que le fichier est bien dans le dossier frames (sécurité)
-        if not str(file_path.resolve()).startswith(str(Path("frames").resolve())):
+        if not file_path.is_relative_to(FRAMES_ROOT):
             raise HTTPException(status_code=400, detail="Chemin de fichier invalide")
         
+        # Vérifier que le fichier existe (un seul stat, réutilisé par FileResponse)
+        file_stat = _stat_regular_file(file_path)
+        if file_stat is None:
+            raise HTTPException(status_code=404, detail="Fichier non trouvé")
+        
         # Retourner le fichier PNG
         return FileResponse(
             file_path,
             media_type="image/png",
-            filename=filename
+            filename=filename,
+            stat_result=file_stat,
+            headers=IMMUTABLE_CACHE_HEADERS if _has_uuid_name(file_path) else None
         )
         
     except HTTPException:
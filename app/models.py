@@ -67,6 +67,8 @@ class PrintingConfig(BaseModel):
     max_copies: int = Field(5, ge=1, le=10)
     retry_attempts: int = Field(3, ge=1, le=5)
     retry_delay: int = Field(2, ge=1, le=10)
+    max_concurrent_jobs: int = Field(0, ge=0, le=32)  # 0 = nombre de CPU
+    queue_timeout: int = Field(30, ge=1, le=300)  # secondes
 
 
 class EmailConfig(BaseModel):
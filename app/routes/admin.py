@@ -1,12 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, BackgroundTasks
 from fastapi.responses import FileResponse
 from loguru import logger
 from typing import List, Optional
 import os
 import json
-from pathlib import Path
 from datetime import datetime
 import shutil
+import tempfile
 import time
 
 from ..admin.auth import admin_auth
@@ -14,6 +14,28 @@ from ..models import LoginRequest, LoginResponse, LogoutResponse
 
 router = APIRouter(prefix="/admin", tags=["administration"])
 
+# Dossiers de données (créés au démarrage de l'application)
+UPLOADS_DIR = "uploads"
+LOGS_DIR = "logs"
+BACKUPS_DIR = "backups"
+
+# Extensions des photos listées dans l'administration
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp'}
+
+
+def _is_photo(entry: os.DirEntry) -> bool:
+    """Indique si une entrée du dossier uploads est une photo"""
+    return entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+
+
+def _latest_log() -> Optional[str]:
+    """Retourne le chemin du fichier de log le plus récent"""
+    with os.scandir(LOGS_DIR) as entries:
+        log_files = [entry for entry in entries if entry.is_file() and entry.name.endswith(".log")]
+    if not log_files:
+        return None
+    return max(log_files, key=lambda entry: entry.stat().st_mtime).path
+
 
 async def get_current_admin(request: Request) -> Optional[dict]:
     """Dépendance pour récupérer l'utilisateur admin actuel"""
@@ -49,16 +71,9 @@ async def get_photos_count(current_admin: dict = Depends(get_current_admin)):
         raise HTTPException(status_code=401, detail="Non authentifié")
     
     try:
-        uploads_dir = Path("uploads")
-        if not uploads_dir.exists():
-            return {"count": 0}
-        
         # Compter les fichiers d'images
-        image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp'}
-        count = 0
-        for file_path in uploads_dir.iterdir():
-            if file_path.is_file() and file_path.suffix.lower() in image_extensions:
-                count += 1
+        with os.scandir(UPLOADS_DIR) as entries:
+            count = sum(1 for entry in entries if _is_photo(entry))
         
         return {"count": count}
         
@@ -75,25 +90,21 @@ async def get_photos(current_admin: dict = Depends(get_current_admin)):
         raise HTTPException(status_code=401, detail="Non authentifié")
     
     try:
-        uploads_dir = Path("uploads")
-        if not uploads_dir.exists():
-            return {"photos": []}
-        
         # Lister les fichiers d'images
-        image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp'}
-        photos = []
-        
-        for file_path in uploads_dir.iterdir():
-            if file_path.is_file() and file_path.suffix.lower() in image_extensions:
-                stat = file_path.stat()
-                photos.append({
-                    "filename": file_path.name,
-                    "size": f"{stat.st_size / 1024:.1f} KB",
-                    "date": datetime.fromtimestamp(stat.st_mtime).strftime("%d/%m/%Y %H:%M")
-                })
+        with os.scandir(UPLOADS_DIR) as entries:
+            photo_stats = [(entry.name, entry.stat()) for entry in entries if _is_photo(entry)]
         
         # Trier par date de modification (plus récent en premier)
-        photos.sort(key=lambda x: x["date"], reverse=True)
+        photo_stats.sort(key=lambda item: item[1].st_mtime, reverse=True)
+        
+        photos = [
+            {
+                "filename": name,
+                "size": f"{stat.st_size / 1024:.1f} KB",
+                "date": datetime.fromtimestamp(stat.st_mtime).strftime("%d/%m/%Y %H:%M")
+            }
+            for name, stat in photo_stats
+        ]
         
         return {"photos": photos}
         
@@ -110,18 +121,21 @@ async def delete_photo(filename: str, current_admin: dict = Depends(get_current_
         raise HTTPException(status_code=401, detail="Non authentifié")
     
     try:
-        file_path = Path("uploads") / filename
+        file_path = os.path.join(UPLOADS_DIR, filename)
         
         # Vérifier que le fichier existe et est dans le dossier uploads
-        if not file_path.exists() or not file_path.is_file():
+        if not os.path.isfile(file_path):
             raise HTTPException(status_code=404, detail="Photo non trouvée")
         
         # Vérifier que le fichier est bien dans le dossier uploads
-        if not str(file_path.resolve()).startswith(str(Path("uploads").resolve())):
+        # (commonpath: "uploads_old/x" ne doit pas passer pour un fichier de "uploads")
+        real_path = os.path.realpath(file_path)
+        root = os.path.realpath(UPLOADS_DIR)
+        if os.path.commonpath([real_path, root]) != root:
             raise HTTPException(status_code=400, detail="Chemin de fichier invalide")
         
         # Supprimer le fichier
-        file_path.unlink()
+        os.unlink(file_path)
         
         logger.info(f"Photo supprimée: {filename} par {current_admin.get('username')}")
         return {"success": True, "message": "Photo supprimée avec succès"}
@@ -181,18 +195,11 @@ async def get_logs(
         raise HTTPException(status_code=401, detail="Non authentifié")
     
     try:
-        logs_dir = Path("logs")
-        if not logs_dir.exists():
-            return {"logs": []}
-        
         # Chercher le fichier de log le plus récent
-        log_files = list(logs_dir.glob("*.log"))
-        if not log_files:
+        latest_log = _latest_log()
+        if not latest_log:
             return {"logs": []}
         
-        # Prendre le fichier le plus récent
-        latest_log = max(log_files, key=lambda x: x.stat().st_mtime)
-        
         logs = []
         try:
             with open(latest_log, 'r', encoding='utf-8') as f:
@@ -240,18 +247,17 @@ async def clear_logs(current_admin: dict = Depends(get_current_admin)):
         raise HTTPException(status_code=401, detail="Non authentifié")
     
     try:
-        logs_dir = Path("logs")
-        if not logs_dir.exists():
-            return {"success": True, "message": "Aucun log à effacer"}
-        
         # Effacer tous les fichiers .log
         cleared_count = 0
-        for log_file in logs_dir.glob("*.log"):
-            try:
-                log_file.unlink()
-                cleared_count += 1
-            except Exception as e:
-                logger.error(f"Erreur lors de la suppression de {log_file}: {e}")
+        with os.scandir(LOGS_DIR) as entries:
+            for entry in entries:
+                if not (entry.is_file() and entry.name.endswith(".log")):
+                    continue
+                try:
+                    os.unlink(entry.path)
+                    cleared_count += 1
+                except Exception as e:
+                    logger.error(f"Erreur lors de la suppression de {entry.path}: {e}")
         
         logger.info(f"Logs effacés par {current_admin.get('username')}: {cleared_count} fichiers")
         return {"success": True, "message": f"{cleared_count} fichiers de log effacés"}
@@ -263,46 +269,39 @@ async def clear_logs(current_admin: dict = Depends(get_current_admin)):
 
 # Endpoint pour exporter les logs
 @router.get("/logs/export")
-async def export_logs(current_admin: dict = Depends(get_current_admin)):
+async def export_logs(background_tasks: BackgroundTasks, current_admin: dict = Depends(get_current_admin)):
     """Exporte les logs en fichier texte"""
     if not current_admin:
         raise HTTPException(status_code=401, detail="Non authentifié")
     
     try:
-        logs_dir = Path("logs")
-        if not logs_dir.exists():
-            raise HTTPException(status_code=404, detail="Aucun log disponible")
-        
         # Chercher le fichier de log le plus récent
-        log_files = list(logs_dir.glob("*.log"))
-        if not log_files:
+        latest_log = _latest_log()
+        if not latest_log:
             raise HTTPException(status_code=404, detail="Aucun fichier de log trouvé")
         
-        latest_log = max(log_files, key=lambda x: x.stat().st_mtime)
-        
-        # Lire le contenu des logs
+        # Écrire l'export dans un fichier temporaire, supprimé après l'envoi de la réponse
+        fd, export_file = tempfile.mkstemp(prefix="photobooth_logs_", suffix=".txt")
         try:
-            with open(latest_log, 'r', encoding='utf-8') as f:
-                log_content = f.read()
+            with open(fd, 'wb') as target, open(latest_log, 'rb') as source:
+                target.write(f"""Export des logs - {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
+Exporté par: {current_admin.get('username')}
+{'=' * 50}
+
+""".encode('utf-8'))
+                # Copie par blocs de 1 Mo pour ne pas charger tout le log en mémoire
+                shutil.copyfileobj(source, target, length=1024 * 1024)
         except Exception as e:
+            _remove_file(export_file)
             logger.error(f"Erreur lors de la lecture du fichier de log: {e}")
             raise HTTPException(status_code=500, detail="Erreur lors de la lecture des logs")
         
-        # Créer le contenu de l'export
-        export_content = f"""Export des logs - {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-Exporté par: {current_admin.get('username')}
-{'=' * 50}
-
-{log_content}"""
+        background_tasks.add_task(_remove_file, export_file)
         
-        # Retourner le contenu en tant que réponse texte
-        from fastapi.responses import Response
-        return Response(
-            content=export_content,
+        return FileResponse(
+            export_file,
             media_type='text/plain',
-            headers={
-                'Content-Disposition': f'attachment; filename="photobooth_logs_{datetime.now().strftime("%Y%m%d_%H%M%S")}.txt"'
-            }
+            filename=f"photobooth_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
         )
         
     except HTTPException:
@@ -312,6 +311,16 @@ Exporté par: {current_admin.get('username')}
         raise HTTPException(status_code=500, detail="Erreur lors de l'export des logs")
 
 
+def _remove_file(path: str):
+    """Supprime un fichier temporaire une fois la réponse envoyée"""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.error(f"Erreur lors de la suppression du fichier temporaire {path}: {e}")
+
+
 # Endpoint pour redémarrer le système
 @router.post("/system/restart")
 async def restart_system(current_admin: dict = Depends(get_current_admin)):
@@ -334,7 +343,7 @@ async def restart_system(current_admin: dict = Depends(get_current_admin)):
 
 # Endpoint pour la sauvegarde du système
 @router.post("/system/backup")
-async def backup_system(current_admin: dict = Depends(get_current_admin)):
+async def backup_system(background_tasks: BackgroundTasks, current_admin: dict = Depends(get_current_admin)):
     """Crée une sauvegarde du système"""
     if not current_admin:
         raise HTTPException(status_code=401, detail="Non authentifié")
@@ -342,68 +351,54 @@ async def backup_system(current_admin: dict = Depends(get_current_admin)):
     try:
         logger.info(f"Demande de sauvegarde par {current_admin.get('username')}")
         
-        # Créer un dossier de sauvegarde
-        backup_dir = Path("backups")
-        backup_dir.mkdir(exist_ok=True)
-        
         # Créer un nom de fichier unique
         backup_name = f"photobooth_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        backup_path = backup_dir / backup_name
+        backup_path = os.path.join(BACKUPS_DIR, backup_name)
+        zip_path = f"{backup_path}.zip"
         
         # Créer la sauvegarde (simulation)
         try:
             # Copier les dossiers importants
-            if Path("uploads").exists():
-                shutil.copytree("uploads", backup_path / "uploads", dirs_exist_ok=True)
-            
-            if Path("config").exists():
-                shutil.copytree("config", backup_path / "config", dirs_exist_ok=True)
+            shutil.copytree(UPLOADS_DIR, os.path.join(backup_path, "uploads"), dirs_exist_ok=True)
+            shutil.copytree("config", os.path.join(backup_path, "config"), dirs_exist_ok=True)
             
             # Créer un fichier d'information
-            info_file = backup_path / "backup_info.txt"
+            info_file = os.path.join(backup_path, "backup_info.txt")
             with open(info_file, 'w', encoding='utf-8') as f:
                 f.write(f"Sauvegarde créée le {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
                 f.write(f"Créée par: {current_admin.get('username')}\n")
                 f.write("Contenu: uploads, config\n")
             
             # Créer l'archive ZIP
-            shutil.make_archive(str(backup_path), 'zip', backup_path)
-            zip_path = Path(f"{backup_path}.zip")
-            
-            # Retourner le fichier ZIP
-            response = FileResponse(
-                zip_path,
-                media_type='application/zip',
-                filename=f"{backup_name}.zip"
-            )
-            
-            # Nettoyer après l'envoi
-            import asyncio
-            asyncio.create_task(cleanup_backup_files(backup_path, zip_path))
-            
-            return response
+            shutil.make_archive(backup_path, 'zip', backup_path)
             
         except Exception as e:
             # Nettoyer en cas d'erreur
-            if backup_path.exists():
-                shutil.rmtree(backup_path)
-            if zip_path.exists():
-                zip_path.unlink()
+            cleanup_backup_files(backup_path, zip_path)
             raise e
         
+        # Nettoyer une fois le fichier ZIP envoyé
+        background_tasks.add_task(cleanup_backup_files, backup_path, zip_path)
+        
+        # Retourner le fichier ZIP
+        return FileResponse(
+            zip_path,
+            media_type='application/zip',
+            filename=f"{backup_name}.zip"
+        )
+        
     except Exception as e:
         logger.error(f"Erreur lors de la création de la sauvegarde: {e}")
         raise HTTPException(status_code=500, detail="Erreur lors de la création de la sauvegarde")
 
 
-async def cleanup_backup_files(backup_path: Path, zip_path: Path):
-    """Nettoie les fichiers de sauvegarde après un délai"""
-    await asyncio.sleep(5)  # Attendre 5 secondes
+def cleanup_backup_files(backup_path: str, zip_path: str):
+    """Nettoie les fichiers de sauvegarde temporaires"""
     try:
-        if backup_path.exists():
+        if os.path.isdir(backup_path):
             shutil.rmtree(backup_path)
-        if zip_path.exists():
-            zip_path.unlink()
+        if os.path.exists(zip_path):
+            os.unlink(zip_path)
     except Exception as e:
         logger.error(f"Erreur lors du nettoyage des fichiers de sauvegarde: {e}")
 
@@ -485,17 +480,20 @@ async def get_active_sessions(current_admin: dict = Depends(get_current_admin)):
         raise HTTPException(status_code=401, detail="Non authentifié")
     
     try:
-        sessions = []
+        fromtimestamp = datetime.fromtimestamp
+        date_format = "%d/%m/%Y %H:%M:%S"
         current_time = time.time()
         
-        for token, session_data in admin_auth.active_sessions.items():
-            if current_time < session_data["expires_at"]:
-                sessions.append({
-                    "username": session_data["username"],
-                    "login_time": datetime.fromtimestamp(session_data["login_time"]).strftime("%d/%m/%Y %H:%M:%S"),
-                    "expires_at": datetime.fromtimestamp(session_data["expires_at"]).strftime("%d/%m/%Y %H:%M:%S"),
-                    "remaining_time": max(0, session_data["expires_at"] - current_time)
-                })
+        sessions = [
+            {
+                "username": session_data["username"],
+                "login_time": fromtimestamp(session_data["login_time"]).strftime(date_format),
+                "expires_at": fromtimestamp(expires_at).strftime(date_format),
+                "remaining_time": expires_at - current_time
+            }
+            for session_data in admin_auth.active_sessions.values()
+            if (expires_at := session_data["expires_at"]) > current_time
+        ]
         
         return {"sessions": sessions}
         
@@ -9,6 +9,29 @@ from ..config import config_manager
 router = APIRouter(prefix="/admin", tags=["administration"])
 security = HTTPBearer(auto_error=False)
 
+# Paramètres du cookie de session (reconstruits au démarrage et lors d'un changement de configuration)
+_COOKIE_KWARGS: Dict[str, Any] = {}
+
+
+def refresh_cookie_settings():
+    """Précalcule les paramètres du cookie de session depuis la configuration"""
+    _COOKIE_KWARGS.clear()
+    _COOKIE_KWARGS.update(
+        key="session_token",
+        httponly=True,
+        secure=False,  # False pour le développement local, True en production avec HTTPS
+        samesite="lax",
+        max_age=config_manager.config.security.session_timeout,
+        path="/"
+    )
+
+
+def _cookie_kwargs() -> Dict[str, Any]:
+    """Paramètres du cookie de session, calculés à la demande si le lifespan ne l'a pas fait"""
+    if not _COOKIE_KWARGS:
+        refresh_cookie_settings()
+    return _COOKIE_KWARGS
+
 
 async def get_current_admin(
     authorization: Optional[str] = Depends(security),
@@ -52,15 +75,7 @@ async def admin_login(
         
         # Configuration du cookie de session sécurisé
         if auth_result.token:
-            response.set_cookie(
-                key="session_token",
-                value=auth_result.token,
-                httponly=True,
-                secure=False,  # False pour le développement local, True en production avec HTTPS
-                samesite="lax",
-                max_age=config_manager.config.security.session_timeout,
-                path="/"
-            )
+            response.set_cookie(value=auth_result.token, **_cookie_kwargs())
             
             logger.info(f"Connexion admin réussie pour l'utilisateur: {login_data.username}")
         
@@ -191,15 +206,7 @@ async def refresh_session(
         
         if new_token and response:
             # Mettre à jour le cookie
-            response.set_cookie(
-                key="session_token",
-                value=new_token,
-                httponly=True,
-                secure=False,
-                samesite="lax",
-                max_age=config_manager.config.security.session_timeout,
-                path="/"
-            )
+            response.set_cookie(value=new_token, **_cookie_kwargs())
             
             logger.info(f"Session rafraîchie pour l'utilisateur: {current_admin.get('username')}")
             
@@ -1,13 +1,38 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from loguru import logger
+import json
 from typing import Dict, Any
-from ..models import ConfigResponse, ConfigUpdateRequest, ErrorResponse
+from ..models import Config, AppConfig, SecurityConfig, ConfigResponse, ConfigUpdateRequest, ErrorResponse
 from ..config import config_manager
 from ..admin.auth import admin_auth
-from ..routes.auth import get_current_admin
+from ..routes.auth import get_current_admin, refresh_cookie_settings
 
 router = APIRouter(prefix="/config", tags=["configuration"])
 
+# Réponse du schéma JSON sérialisée une seule fois (le modèle ne change pas à l'exécution)
+_CONFIG_SCHEMA_BODY = json.dumps(
+    {
+        "schema": Config.model_json_schema(),
+        "description": "Schéma JSON de la configuration du photobooth",
+        "version": "1.0.0"
+    },
+    ensure_ascii=False,
+    separators=(",", ":")
+).encode("utf-8")
+
+
+def _merge_section(section, model_class, updates: Dict[str, Any], fields: tuple):
+    """Fusionne les champs modifiés dans une section et la valide en une seule passe"""
+    changes = {key: updates[key] for key in fields if key in updates}
+    try:
+        return model_class.model_validate({**section.model_dump(), **changes})
+    except Exception as validation_error:
+        logger.warning(f"Configuration invalide reçue: {validation_error}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Configuration invalide: {str(validation_error)}"
+        )
+
 
 @router.get("/", response_model=ConfigResponse)
 async def get_config():
@@ -52,7 +77,6 @@ async def update_config(
         # Validation de la nouvelle configuration
         try:
             # Créer un objet Config temporaire pour validation
-            from ..models import Config
             validated_config = Config(**config_update.config)
         except Exception as validation_error:
             logger.warning(f"Configuration invalide reçue: {validation_error}")
@@ -65,6 +89,7 @@ async def update_config(
         if config_manager.save_config(config_update.config):
             # Recharger la configuration
             config_manager.reload()
+            refresh_cookie_settings()
             
             logger.info("Configuration mise à jour et rechargée avec succès")
             
@@ -102,6 +127,7 @@ async def reload_config(current_admin: Dict[str, Any] = Depends(get_current_admi
         
         # Recharger la configuration
         config_manager.reload()
+        refresh_cookie_settings()
         
         logger.info("Configuration rechargée avec succès")
         
@@ -158,16 +184,7 @@ async def validate_config():
 async def get_config_schema():
     """Retourne le schéma de la configuration (pour documentation)"""
     try:
-        from ..models import Config
-        
-        # Générer le schéma JSON de la configuration
-        schema = Config.model_json_schema()
-        
-        return {
-            "schema": schema,
-            "description": "Schéma JSON de la configuration du photobooth",
-            "version": "1.0.0"
-        }
+        return Response(content=_CONFIG_SCHEMA_BODY, media_type="application/json")
         
     except Exception as e:
         logger.error(f"Erreur lors de la génération du schéma: {e}")
@@ -192,12 +209,9 @@ async def update_app_config(
         # Mettre à jour la configuration de l'application
         if config_manager.config:
             # Mettre à jour les champs de l'application
-            if 'name' in app_config:
-                config_manager.config.app.name = app_config['name']
-            if 'version' in app_config:
-                config_manager.config.app.version = app_config['version']
-            if 'debug' in app_config:
-                config_manager.config.app.debug = app_config['debug']
+            config_manager.config.app = _merge_section(
+                config_manager.config.app, AppConfig, app_config, ('name', 'version', 'debug')
+            )
             
             # Sauvegarder la configuration
             if config_manager.save_config(config_manager.config.model_dump()):
@@ -233,10 +247,11 @@ async def update_security_config(
         # Mettre à jour la configuration de sécurité
         if config_manager.config:
             # Mettre à jour les champs de sécurité
+            config_manager.config.security = _merge_section(
+                config_manager.config.security, SecurityConfig, security_config, ('session_timeout', 'bcrypt_rounds')
+            )
             if 'session_timeout' in security_config:
-                config_manager.config.security.session_timeout = security_config['session_timeout']
-            if 'bcrypt_rounds' in security_config:
-                config_manager.config.security.bcrypt_rounds = security_config['bcrypt_rounds']
+                refresh_cookie_settings()
             
             # Sauvegarder la configuration
             if config_manager.save_config(config_manager.config.model_dump()):
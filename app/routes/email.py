@@ -6,8 +6,11 @@ Gestion SMTP avec consentement RGPD et rate limiting
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import JSONResponse
 from loguru import logger
+import re
+import threading
 import time
-from typing import Dict, Any
+from collections import OrderedDict
+from typing import Dict, Any, Tuple
 
 from ..models import EmailRequest, EmailResponse, GdprConsentResponse
 from ..emailer.send import EmailSender
@@ -19,65 +22,56 @@ router = APIRouter(prefix="/email", tags=["email"])
 # Instance du gestionnaire d'email
 email_sender = None
 
-# Rate limiting pour l'email
+# Rate limiting pour l'email (fenêtre fixe par IP)
 email_rate_limit = 10  # emails par heure
 email_rate_window = 3600  # 1 heure
-email_attempts = {}
+email_rate_max_clients = 10_000  # Nombre maximal d'IP suivies
+email_attempts: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()  # IP -> (début de fenêtre, compteur)
+email_attempts_lock = threading.Lock()
+
+# Pattern simple de validation email
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+
+def init_email_sender() -> EmailSender:
+    """Crée le gestionnaire d'email à partir de la configuration (appelé au démarrage)"""
+    global email_sender
+    config = {"email": config_manager.config.email.model_dump()} if config_manager.config else {}
+    email_sender = EmailSender(config)
+    return email_sender
 
 
 def get_email_sender() -> EmailSender:
     """Récupère l'instance du gestionnaire d'email"""
-    global email_sender
     if email_sender is None:
-        # Convertir la configuration en dictionnaire
-        if config_manager.config:
-            config = {
-                "email": {
-                    "smtp_server": config_manager.config.email.smtp_server,
-                    "smtp_port": config_manager.config.email.smtp_port,
-                    "smtp_use_tls": config_manager.config.email.smtp_use_tls,
-                    "smtp_use_ssl": config_manager.config.email.smtp_use_ssl,
-                    "smtp_username": config_manager.config.email.smtp_username,
-                    "smtp_password": config_manager.config.email.smtp_password,
-                    "from_email": config_manager.config.email.from_email,
-                    "from_name": config_manager.config.email.from_name,
-                    "subject_template": config_manager.config.email.subject_template,
-                    "body_template": config_manager.config.email.body_template,
-                    "max_attachment_size": config_manager.config.email.max_attachment_size,
-                    "thumbnail_size": config_manager.config.email.thumbnail_size,
-                    "thumbnail_quality": config_manager.config.email.thumbnail_quality,
-                    "gdpr_consent_required": config_manager.config.email.gdpr_consent_required,
-                    "gdpr_consent_text": config_manager.config.email.gdpr_consent_text,
-                    "gdpr_retention_days": config_manager.config.email.gdpr_retention_days,
-                    "rate_limit_emails": config_manager.config.email.rate_limit_emails,
-                    "rate_limit_window": config_manager.config.email.rate_limit_window
-                }
-            }
-        else:
-            config = {}
-        email_sender = EmailSender(config)
+        return init_email_sender()
     return email_sender
 
 
 def check_email_rate_limit(request: Request) -> bool:
     """Vérifie le rate limiting pour l'envoi d'email"""
     client_ip = request.client.host
-    current_time = time.time()
+    current_time = time.monotonic()
     
-    # Nettoyer les anciennes tentatives
-    if client_ip in email_attempts:
-        email_attempts[client_ip] = [t for t in email_attempts[client_ip] 
-                                    if current_time - t < email_rate_window]
-    
-    # Vérifier la limite
-    if client_ip not in email_attempts:
-        email_attempts[client_ip] = []
-    
-    if len(email_attempts[client_ip]) >= email_rate_limit:
-        return False
+    with email_attempts_lock:
+        # Démarrer une nouvelle fenêtre si la précédente est écoulée
+        window_start, count = email_attempts.get(client_ip, (current_time, 0))
+        if current_time - window_start >= email_rate_window:
+            window_start, count = current_time, 0
+        
+        # Vérifier la limite
+        if count >= email_rate_limit:
+            email_attempts.move_to_end(client_ip)
+            return False
+        
+        # Enregistrer la tentative actuelle
+        email_attempts[client_ip] = (window_start, count + 1)
+        email_attempts.move_to_end(client_ip)
+        
+        # Oublier les IP les moins récemment vues au-delà de la limite
+        if len(email_attempts) > email_rate_max_clients:
+            email_attempts.popitem(last=False)
     
-    # Ajouter la tentative actuelle
-    email_attempts[client_ip].append(current_time)
     return True
 
 
@@ -232,12 +226,7 @@ async def test_email():
 @router.post("/validate-email")
 async def validate_email_format(email: str):
     """Valide le format d'une adresse email"""
-    import re
-    
-    # Pattern simple de validation email
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    
-    if re.match(email_pattern, email):
+    if EMAIL_PATTERN.match(email):
         return {"valid": True, "email": email}
     else:
         return {"valid": False, "email": email, "error": "Format d'email invalide"}
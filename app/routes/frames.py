@@ -1,14 +1,21 @@
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request
-from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
 from loguru import logger
 from typing import List, Optional
 import os
 import json
+import asyncio
 from pathlib import Path
 from datetime import datetime
 import uuid
-from PIL import Image
+import aiofiles
 import io
+import struct
+
+try:
+    import orjson  # Lecture/écriture plus rapide de frames.json (optionnel, repli sur json)
+except ImportError:
+    orjson = None
 
 from ..admin.auth import admin_auth
 from ..models import FrameCreate, FrameUpdate, Frame
@@ -23,30 +30,112 @@ FRAMES_DIR.mkdir(exist_ok=True)
 # Fichier de configuration des cadres
 FRAMES_CONFIG_FILE = Path("config/frames.json")
 
+# Signature (magic bytes) d'un fichier PNG
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_HEADER_SIZE = 24  # signature + longueur et type du chunk IHDR + largeur/hauteur
+
+# Taille des blocs lus lors de l'enregistrement d'un upload
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Verrou sérialisant les modifications de la configuration des cadres
+frames_config_lock = asyncio.Lock()
+
+# Configuration des cadres en mémoire, invalidée quand le fichier change sur disque
+_frames_cache = {"mtime": None, "data": None, "raw": None, "by_id": {}, "active": None}
+
+def _set_frames_cache(mtime, data, raw=None):
+    """Met en cache la configuration, son index par identifiant et le cadre actif
+    
+    Garantit qu'un seul cadre est actif: si plusieurs le sont (fichier édité à la main),
+    seul le premier est conservé et les autres sont désactivés.
+    """
+    active = [frame for frame in data["frames"] if frame.get("active", False)]
+    if len(active) > 1:
+        logger.warning(f"{len(active)} cadres actifs dans la configuration, seul '{active[0]['id']}' est conservé")
+        extra = {id(frame) for frame in active[1:]}
+        data = {**data, "frames": [
+            {**frame, "active": False} if id(frame) in extra else frame for frame in data["frames"]
+        ]}
+        # Le contenu ne correspond plus au fichier: la prochaine sauvegarde le réécrira
+        raw = None
+    _frames_cache["mtime"] = mtime
+    _frames_cache["data"] = data
+    _frames_cache["raw"] = raw
+    _frames_cache["by_id"] = {frame["id"]: frame for frame in data["frames"]}
+    _frames_cache["active"] = active[0] if active else None
+    return data
+
+def _loads_frames(raw: bytes):
+    """Décode le JSON de configuration des cadres (orjson si disponible)"""
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+def _dumps_frames(config) -> bytes:
+    """Encode la configuration des cadres en JSON indenté (même format avec ou sans orjson)"""
+    if orjson:
+        return orjson.dumps(config, option=orjson.OPT_INDENT_2)
+    return json.dumps(config, indent=2, ensure_ascii=False).encode("utf-8")
+
 def load_frames_config():
-    """Charge la configuration des cadres depuis le fichier JSON"""
-    if FRAMES_CONFIG_FILE.exists():
-        try:
-            with open(FRAMES_CONFIG_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"Erreur lors du chargement de la configuration des cadres: {e}")
-            return {"frames": []}
-    return {"frames": []}
+    """Charge la configuration des cadres depuis le fichier JSON (mise en cache selon mtime)"""
+    try:
+        mtime = FRAMES_CONFIG_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return _set_frames_cache(None, {"frames": []})
+    
+    if mtime == _frames_cache["mtime"]:
+        return _frames_cache["data"]
+    
+    try:
+        with open(FRAMES_CONFIG_FILE, 'rb') as f:
+            raw = f.read()
+        data = _loads_frames(raw)
+    except Exception as e:
+        logger.error(f"Erreur lors du chargement de la configuration des cadres: {e}")
+        return _set_frames_cache(None, {"frames": []})
+    
+    return _set_frames_cache(mtime, data, raw)
+
+def get_frame_by_id(frame_id: str) -> Optional[dict]:
+    """Retourne un cadre de la configuration chargée par load_frames_config()"""
+    return _frames_cache["by_id"].get(frame_id)
+
+def current_active_frame() -> Optional[dict]:
+    """Retourne le cadre actif de la configuration chargée par load_frames_config()"""
+    return _frames_cache["active"]
 
 def save_frames_config(config):
-    """Sauvegarde la configuration des cadres dans le fichier JSON"""
+    """Sauvegarde la configuration des cadres dans le fichier JSON (écriture atomique)
+    
+    La configuration passée doit être un nouvel objet: elle ne remplace celle du
+    cache qu'après une écriture réussie. Ne jamais modifier le cache en place.
+    """
+    tmp_file = FRAMES_CONFIG_FILE.with_suffix(".json.tmp")
     try:
+        raw = _dumps_frames(config)
+        
+        # Rien à écrire si le contenu est identique à celui du fichier
+        if _frames_cache["mtime"] is not None and raw == _frames_cache["raw"]:
+            return True
+        
+        # Écrire dans un fichier temporaire puis le renommer: jamais de fichier à moitié écrit
         FRAMES_CONFIG_FILE.parent.mkdir(exist_ok=True)
-        with open(FRAMES_CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
+        with open(tmp_file, 'wb') as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, FRAMES_CONFIG_FILE)
+        
+        # Mettre à jour le cache avec la configuration écrite
+        _set_frames_cache(FRAMES_CONFIG_FILE.stat().st_mtime_ns, config, raw)
         return True
     except Exception as e:
+        tmp_file.unlink(missing_ok=True)
+        # Le fichier a pu être remplacé ou non: forcer une relecture depuis le disque
+        _frames_cache["mtime"] = None
         logger.error(f"Erreur lors de la sauvegarde de la configuration des cadres: {e}")
         return False
 
 
-
 @router.get("/")
 async def get_frames(request: Request, current_admin: dict = Depends(get_current_admin)):
     """Récupère la liste de tous les cadres"""
@@ -67,9 +156,8 @@ async def get_active_frame(request: Request, current_admin: dict = Depends(get_c
         raise HTTPException(status_code=401, detail="Non authentifié")
     
     try:
-        config = load_frames_config()
-        active_frame = next((frame for frame in config["frames"] if frame.get("active", False)), None)
-        return {"frame": active_frame}
+        load_frames_config()
+        return {"frame": current_active_frame()}
     except Exception as e:
         logger.error(f"Erreur lors de la récupération du cadre actif: {e}")
         raise HTTPException(status_code=500, detail="Erreur lors de la récupération du cadre actif")
@@ -81,8 +169,8 @@ async def get_frame(frame_id: str, request: Request, current_admin: dict = Depen
         raise HTTPException(status_code=401, detail="Non authentifié")
     
     try:
-        config = load_frames_config()
-        frame = next((f for f in config["frames"] if f["id"] == frame_id), None)
+        load_frames_config()
+        frame = get_frame_by_id(frame_id)
         
         if not frame:
             raise HTTPException(status_code=404, detail="Cadre non trouvé")
@@ -112,14 +200,19 @@ async def create_frame(
         raise HTTPException(status_code=401, detail="Non authentifié")
     
     try:
-        # Vérifier le type de fichier
-        if not file.content_type.startswith("image/"):
-            raise HTTPException(status_code=400, detail="Le fichier doit être une image")
-        
         # Vérifier l'extension
-        if not file.filename.lower().endswith('.png'):
+        if not file.filename or not file.filename.lower().endswith('.png'):
             raise HTTPException(status_code=400, detail="Seuls les fichiers PNG sont acceptés")
         
+        # Vérifier la signature du fichier (le type MIME fourni par le client n'est pas fiable)
+        head = await file.read(PNG_HEADER_SIZE)
+        if len(head) < PNG_HEADER_SIZE or not head.startswith(PNG_SIGNATURE) or head[12:16] != b'IHDR':
+            raise HTTPException(status_code=400, detail="Le fichier doit être une image PNG")
+        await file.seek(0)
+        
+        # Dimensions lues directement dans l'en-tête IHDR (entiers big-endian)
+        width, height = struct.unpack(">II", head[16:24])
+        
         # Générer un ID unique
         frame_id = str(uuid.uuid4())
         
@@ -128,18 +221,10 @@ async def create_frame(
         filename = f"{frame_id}{file_extension}"
         file_path = FRAMES_DIR / filename
         
-        # Sauvegarder le fichier
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        # Charger l'image pour obtenir les dimensions
-        try:
-            with Image.open(file_path) as img:
-                width, height = img.size
-        except Exception as e:
-            logger.error(f"Erreur lors de la lecture de l'image: {e}")
-            width, height = 100, 100
+        # Sauvegarder le fichier par blocs, sans charger tout l'upload en mémoire
+        async with aiofiles.open(file_path, "wb") as buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await buffer.write(chunk)
         
         # Créer l'objet cadre
         frame_data = {
@@ -161,23 +246,28 @@ async def create_frame(
             frame_data["x"] = x
             frame_data["y"] = y
         
-        # Charger la configuration existante
-        config = load_frames_config()
-        
-        # Désactiver tous les autres cadres si celui-ci est actif
-        if active:
-            for frame in config["frames"]:
-                frame["active"] = False
-        
-        # Ajouter le nouveau cadre
-        config["frames"].append(frame_data)
-        
-        # Sauvegarder la configuration
-        if not save_frames_config(config):
-            # Supprimer le fichier si la sauvegarde échoue
-            if file_path.exists():
-                file_path.unlink()
-            raise HTTPException(status_code=500, detail="Erreur lors de la sauvegarde de la configuration")
+        # Lecture-modification-écriture de la configuration sous verrou
+        async with frames_config_lock:
+            # Charger la configuration existante
+            config = load_frames_config()
+            
+            # Construire la nouvelle liste sur une copie: les lecteurs (sans verrou) ne voient
+            # le changement qu'une fois la sauvegarde réussie
+            frames = list(config["frames"])
+            
+            # Désactiver le cadre précédemment actif si celui-ci est actif
+            previous_active = current_active_frame()
+            if active and previous_active is not None:
+                frames[frames.index(previous_active)] = {**previous_active, "active": False}
+            
+            # Ajouter le nouveau cadre
+            frames.append(frame_data)
+            
+            # Sauvegarder la configuration
+            if not await run_in_threadpool(save_frames_config, {**config, "frames": frames}):
+                # Supprimer le fichier si la sauvegarde échoue
+                await run_in_threadpool(file_path.unlink, missing_ok=True)
+                raise HTTPException(status_code=500, detail="Erreur lors de la sauvegarde de la configuration")
         
         logger.info(f"Cadre créé: {name} par {current_admin.get('username')}")
         return {"success": True, "frame": frame_data}
@@ -195,22 +285,31 @@ async def toggle_frame_active(frame_id: str, request: Request, current_admin: di
         raise HTTPException(status_code=401, detail="Non authentifié")
     
     try:
-        config = load_frames_config()
-        frame = next((f for f in config["frames"] if f["id"] == frame_id), None)
-        
-        if not frame:
-            raise HTTPException(status_code=404, detail="Cadre non trouvé")
-        
-        # Désactiver tous les autres cadres
-        for f in config["frames"]:
-            f["active"] = False
-        
-        # Activer le cadre sélectionné
-        frame["active"] = True
-        
-        # Sauvegarder la configuration
-        if not save_frames_config(config):
-            raise HTTPException(status_code=500, detail="Erreur lors de la sauvegarde de la configuration")
+        async with frames_config_lock:
+            config = load_frames_config()
+            frame = get_frame_by_id(frame_id)
+            
+            if not frame:
+                raise HTTPException(status_code=404, detail="Cadre non trouvé")
+            
+            # Rien à faire si ce cadre est déjà le cadre actif (un seul cadre actif au plus)
+            previous_active = current_active_frame()
+            if previous_active is frame:
+                return {"success": True, "message": "Cadre activé avec succès"}
+            
+            # Construire la nouvelle liste sur une copie (cache inchangé avant la sauvegarde)
+            frames = list(config["frames"])
+            
+            # Désactiver le cadre précédemment actif
+            if previous_active is not None:
+                frames[frames.index(previous_active)] = {**previous_active, "active": False}
+            
+            # Activer le cadre sélectionné
+            frames[frames.index(frame)] = {**frame, "active": True}
+            
+            # Sauvegarder la configuration
+            if not await run_in_threadpool(save_frames_config, {**config, "frames": frames}):
+                raise HTTPException(status_code=500, detail="Erreur lors de la sauvegarde de la configuration")
         
         logger.info(f"Cadre activé: {frame['name']} par {current_admin.get('username')}")
         return {"success": True, "message": "Cadre activé avec succès"}
@@ -228,23 +327,23 @@ async def delete_frame(frame_id: str, request: Request, current_admin: dict = De
         raise HTTPException(status_code=401, detail="Non authentifié")
     
     try:
-        config = load_frames_config()
-        frame = next((f for f in config["frames"] if f["id"] == frame_id), None)
-        
-        if not frame:
-            raise HTTPException(status_code=404, detail="Cadre non trouvé")
-        
-        # Supprimer le fichier
-        file_path = FRAMES_DIR / frame["filename"]
-        if file_path.exists():
-            file_path.unlink()
-        
-        # Supprimer de la configuration
-        config["frames"] = [f for f in config["frames"] if f["id"] != frame_id]
-        
-        # Sauvegarder la configuration
-        if not save_frames_config(config):
-            raise HTTPException(status_code=500, detail="Erreur lors de la sauvegarde de la configuration")
+        async with frames_config_lock:
+            config = load_frames_config()
+            frame = get_frame_by_id(frame_id)
+            
+            if not frame:
+                raise HTTPException(status_code=404, detail="Cadre non trouvé")
+            
+            # Supprimer de la configuration (nouvelle liste, cache inchangé avant la sauvegarde)
+            frames = [f for f in config["frames"] if f["id"] != frame_id]
+            
+            # Sauvegarder la configuration
+            if not await run_in_threadpool(save_frames_config, {**config, "frames": frames}):
+                raise HTTPException(status_code=500, detail="Erreur lors de la sauvegarde de la configuration")
+            
+            # Supprimer le fichier une fois le cadre retiré de la configuration
+            file_path = FRAMES_DIR / frame["filename"]
+            await run_in_threadpool(file_path.unlink, missing_ok=True)
         
         logger.info(f"Cadre supprimé: {frame['name']} par {current_admin.get('username')}")
         return {"success": True, "message": "Cadre supprimé avec succès"}
@@ -255,31 +354,13 @@ async def delete_frame(frame_id: str, request: Request, current_admin: dict = De
         logger.error(f"Erreur lors de la suppression du cadre {frame_id}: {e}")
         raise HTTPException(status_code=500, detail="Erreur lors de la suppression du cadre")
 
-@router.get("/file/{filename}")
-async def get_frame_file(filename: str):
-    """Récupère le fichier d'un cadre"""
-    try:
-        file_path = FRAMES_DIR / filename
-        
-        if not file_path.exists():
-            raise HTTPException(status_code=404, detail="Fichier non trouvé")
-        
-        return FileResponse(file_path, media_type="image/png")
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Erreur lors de la récupération du fichier {filename}: {e}")
-        raise HTTPException(status_code=500, detail="Erreur lors de la récupération du fichier")
-
-
 # Endpoint public pour récupérer le cadre actif (sans authentification)
 @router.get("/public/active")
 async def get_public_active_frame():
     """Récupère le cadre actif pour l'application photobooth (sans authentification)"""
     try:
-        config = load_frames_config()
-        active_frame = next((frame for frame in config["frames"] if frame.get("active", False)), None)
+        load_frames_config()
+        active_frame = current_active_frame()
         
         if not active_frame:
             return {"frame": None, "message": "Aucun cadre actif"}
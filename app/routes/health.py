@@ -1,13 +1,41 @@
 import time
 import os
+import sys
 import shutil
+import functools
+import asyncio
 from datetime import datetime
 from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
 from loguru import logger
 from ..models import HealthResponse
 from ..config import config_manager
-from ..storage.files import file_storage
+from ..storage.files import get_file_storage
+from .printing import get_printer_manager
+from .email import get_email_sender
 from pathlib import Path
+from typing import Optional
+
+try:
+    import psutil
+    # Premier appel de référence: les suivants avec interval=None sont instantanés
+    psutil.cpu_percent(interval=None)
+except ImportError:
+    psutil = None
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: pas d'ioctl, la caméra est sondée via OpenCV
+    fcntl = None
+
+# OpenCV ne sert qu'hors Linux (sous Linux la caméra est interrogée via V4L2)
+cv2 = None
+if not sys.platform.startswith("linux"):
+    try:
+        import cv2
+    except ImportError:
+        cv2 = None
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -15,18 +43,96 @@ router = APIRouter(prefix="/health", tags=["health"])
 _start_time = None
 
 
+def _ttl_cache(ttl: float):
+    """Mémorise le résultat d'une sonde sans argument pendant `ttl` secondes"""
+    def decorator(func):
+        cache = {"expires": 0.0, "value": None}
+        
+        @functools.wraps(func)
+        def wrapper():
+            now = time.monotonic()
+            if now >= cache["expires"]:
+                cache["value"] = func()
+                cache["expires"] = now + ttl
+            return cache["value"]
+        
+        return wrapper
+    return decorator
+
+
+# Requête V4L2 VIDIOC_QUERYCAP: _IOR('V', 0, struct v4l2_capability) (104 octets)
+VIDIOC_QUERYCAP = 0x80685600
+V4L2_CAPABILITY_SIZE = 104
+
+
+def _query_v4l2_card(device: str) -> Optional[str]:
+    """Lit le nom d'un périphérique V4L2 sans démarrer de capture"""
+    fd = os.open(device, os.O_RDWR | os.O_NONBLOCK)
+    try:
+        capability = bytearray(V4L2_CAPABILITY_SIZE)
+        fcntl.ioctl(fd, VIDIOC_QUERYCAP, capability)
+        # struct v4l2_capability: driver[16], card[32], ...
+        return bytes(capability[16:48]).split(b"\0", 1)[0].decode("utf-8", "replace")
+    finally:
+        os.close(fd)
+
+
+def _get_v4l2_camera_status(device_id: int):
+    """Vérifie la présence de la caméra via /dev/videoN (Linux), sans l'ouvrir en capture"""
+    device = f"/dev/video{device_id}"
+    if not os.path.exists(device):
+        return {
+            "available": False,
+            "error": "Caméra non accessible",
+            "status": "unavailable"
+        }
+    
+    try:
+        card = _query_v4l2_card(device)
+    except OSError as e:
+        return {
+            "available": False,
+            "device_id": device_id,
+            "error": str(e),
+            "status": "error"
+        }
+    
+    resolution = config_manager.config.camera.resolution if config_manager.config else None
+    return {
+        "available": True,
+        "device_id": device_id,
+        "device": device,
+        "name": card,
+        "resolution": f"{resolution[0]}x{resolution[1]}" if resolution else None,
+        "status": "operational"
+    }
+
+
+@_ttl_cache(30)
 def get_camera_status():
     """Récupère le statut de la caméra"""
+    device_id = config_manager.config.camera.device_id if config_manager.config else 0
+    
+    # Sous Linux, interroger le périphérique sans prendre la main sur le flux vidéo
+    if sys.platform.startswith("linux"):
+        return _get_v4l2_camera_status(device_id)
+    
+    if cv2 is None:
+        return {
+            "available": False,
+            "error": "OpenCV non installé",
+            "status": "not_installed"
+        }
+    
     try:
-        import cv2
-        cap = cv2.VideoCapture(0)
+        cap = cv2.VideoCapture(device_id)
         if cap.isOpened():
             ret, frame = cap.read()
             cap.release()
             if ret:
                 return {
                     "available": True,
-                    "device_id": 0,
+                    "device_id": device_id,
                     "resolution": f"{frame.shape[1]}x{frame.shape[0]}",
                     "status": "operational"
                 }
@@ -42,12 +148,6 @@ def get_camera_status():
                 "error": "Caméra non accessible",
                 "status": "unavailable"
             }
-    except ImportError:
-        return {
-            "available": False,
-            "error": "OpenCV non installé",
-            "status": "not_installed"
-        }
     except Exception as e:
         return {
             "available": False,
@@ -56,6 +156,7 @@ def get_camera_status():
         }
 
 
+@_ttl_cache(5)
 def get_disk_space():
     """Récupère l'espace disque disponible"""
     try:
@@ -64,21 +165,15 @@ def get_disk_space():
         if not upload_path.exists():
             upload_path = Path("uploads")
         
-        # Trouver le disque contenant ce dossier
-        disk_path = upload_path.resolve()
-        while disk_path.parent != disk_path:
-            if os.path.ismount(disk_path):
-                break
-            disk_path = disk_path.parent
-        
-        total, used, free = shutil.disk_usage(disk_path)
+        # statvfs renvoie directement les valeurs du système de fichiers contenant ce dossier
+        total, used, free = shutil.disk_usage(upload_path)
         
         return {
             "total_gb": round(total / (1024**3), 2),
             "used_gb": round(used / (1024**3), 2),
             "free_gb": round(free / (1024**3), 2),
             "usage_percent": round((used / total) * 100, 1),
-            "path": str(disk_path)
+            "path": str(upload_path)
         }
     except Exception as e:
         return {
@@ -87,12 +182,11 @@ def get_disk_space():
         }
 
 
+@_ttl_cache(30)
 def get_printer_status():
     """Récupère le statut de l'imprimante"""
     try:
-        from ..printing.printer import PrinterManager
-        config = config_manager.get_config_dict() if config_manager.config else {}
-        printer_mgr = PrinterManager(config)
+        printer_mgr = get_printer_manager()
         
         # Vérifier la disponibilité des imprimantes
         printers = printer_mgr.get_available_printers()
@@ -122,12 +216,11 @@ def get_printer_status():
         }
 
 
+@_ttl_cache(60)
 def get_email_status():
     """Récupère le statut du service email"""
     try:
-        from ..emailer.send import EmailSender
-        config = config_manager.get_config_dict() if config_manager.config else {}
-        email_mgr = EmailSender(config)
+        email_mgr = get_email_sender()
         
         status = email_mgr.get_email_status()
         return {
@@ -146,6 +239,24 @@ def get_email_status():
         }
 
 
+def get_system_info():
+    """Récupère l'utilisation CPU, mémoire et disque du système"""
+    if psutil is None:
+        return {"error": "psutil non disponible"}
+    
+    return {
+        # Utilisation moyenne depuis l'appel précédent, sans attente
+        "cpu_percent": psutil.cpu_percent(interval=None),
+        "memory_percent": psutil.virtual_memory().percent,
+        "disk_usage": psutil.disk_usage('/').percent if hasattr(psutil, 'disk_usage') else None
+    }
+
+
+async def run_probes(*probes):
+    """Exécute des sondes bloquantes en parallèle dans le pool de threads"""
+    return await asyncio.gather(*(run_in_threadpool(probe) for probe in probes))
+
+
 @router.get("/", response_model=HealthResponse)
 async def health_check():
     """Vérification de l'état de santé du système"""
@@ -162,7 +273,7 @@ async def health_check():
         # Vérifications de base
         checks = {
             "config_loaded": config_manager.config is not None,
-            "storage_accessible": file_storage.upload_dir.exists(),
+            "storage_accessible": get_file_storage().upload_dir.exists(),
             "admin_configured": bool(config_manager.config.admin.username),
             "secret_key_set": bool(config_manager.config.security.secret_key)
         }
@@ -179,10 +290,9 @@ async def health_check():
             )
         
         # Récupérer les informations détaillées
-        camera_status = get_camera_status()
-        disk_space = get_disk_space()
-        printer_status = get_printer_status()
-        email_status = get_email_status()
+        camera_status, disk_space, printer_status, email_status = await run_probes(
+            get_camera_status, get_disk_space, get_printer_status, get_email_status
+        )
         
         logger.debug(f"Vérification de santé réussie. Uptime: {uptime:.2f}s")
         
@@ -217,6 +327,8 @@ async def detailed_health_check():
             _start_time = time.time()
         
         uptime = time.time() - _start_time
+        minutes, seconds = divmod(int(uptime), 60)
+        hours, minutes = divmod(minutes, 60)
         
         # Informations détaillées sur la configuration
         config_info = {
@@ -247,31 +359,17 @@ async def detailed_health_check():
             }
         }
         
-        # Statistiques du stockage
-        storage_stats = file_storage.get_storage_stats()
-        
-        # Informations système
-        try:
-            import psutil
-            system_info = {
-                "cpu_percent": psutil.cpu_percent(interval=1),
-                "memory_percent": psutil.virtual_memory().percent,
-                "disk_usage": psutil.disk_usage('/').percent if hasattr(psutil, 'disk_usage') else None
-            }
-        except ImportError:
-            system_info = {"error": "psutil non disponible"}
-        
-        # Informations détaillées des composants
-        camera_status = get_camera_status()
-        disk_space = get_disk_space()
-        printer_status = get_printer_status()
-        email_status = get_email_status()
+        # Statistiques du stockage, informations système et détaillées des composants
+        storage_stats, system_info, camera_status, disk_space, printer_status, email_status = await run_probes(
+            get_file_storage().get_storage_stats, get_system_info, get_camera_status,
+            get_disk_space, get_printer_status, get_email_status
+        )
         
         return {
             "status": "healthy",
             "timestamp": datetime.now().isoformat(),
             "uptime_seconds": round(uptime, 2),
-            "uptime_formatted": f"{int(uptime // 3600)}h {int((uptime % 3600) // 60)}m {int(uptime % 60)}s",
+            "uptime_formatted": f"{hours}h {minutes}m {seconds}s",
             "config": config_info,
             "storage": storage_stats,
             "system": system_info,
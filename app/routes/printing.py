@@ -4,10 +4,15 @@ Gestion des imprimantes et impression avec rate limiting
 """
 
 from fastapi import APIRouter, HTTPException, Depends, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from loguru import logger
+import asyncio
+import os
+import math
+import threading
 import time
-from typing import Dict, Any
+from collections import OrderedDict
+from typing import Dict, Any, Tuple
 
 from ..models import PrintRequest, PrintResponse, PrintersResponse, PrinterInfo
 from ..printing.printer import PrinterManager
@@ -20,63 +25,145 @@ router = APIRouter(prefix="/print", tags=["impression"])
 # Instance du gestionnaire d'impression
 printer_manager = None
 
-# Rate limiting pour l'impression
+# Rate limiting pour l'impression (fenêtre glissante par seaux, par IP)
 print_rate_limit = 5  # impressions par minute
 print_rate_window = 60  # 1 minute
-print_attempts = {}
+print_rate_max_clients = 10_000  # Nombre maximal d'IP suivies
+print_attempts: "OrderedDict[str, Tuple[int, int, int]]" = OrderedDict()  # IP -> (fenêtre, compteur précédent, compteur courant)
+print_attempts_lock = threading.Lock()
+
+# Même algorithme partagé entre workers, exécuté atomiquement par Redis
+# KEYS: compteur de la fenêtre courante, compteur de la précédente
+# ARGV: part écoulée de la fenêtre courante (0-1), limite, durée de vie des compteurs
+PRINT_RATE_LIMIT_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * (1 - tonumber(ARGV[1])) + current >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+_print_rate_script = None
+
+# Nombre maximum d'impressions préparées en parallèle (redimensionnement PIL + spool).
+# max_concurrent_jobs et queue_timeout sont lus une seule fois à l'import: une modification
+# de la configuration n'est prise en compte qu'au redémarrage de l'application.
+print_max_concurrent = (config_manager.config.printing.max_concurrent_jobs if config_manager.config else 0) or os.cpu_count() or 2
+print_queue_timeout = config_manager.config.printing.queue_timeout if config_manager.config else 30  # secondes
+print_semaphore = asyncio.Semaphore(print_max_concurrent)
+
+# Cache de la liste des imprimantes (interrogée régulièrement par l'interface)
+PRINTERS_CACHE_TTL = 5  # secondes
+# (réponse conservée déjà sérialisée en JSON)
+_printers_cache: Dict[str, Any] = {"expires_at": 0.0, "body": None}
+
+# Cache du statut par imprimante, pour regrouper les interrogations rapprochées
+PRINTER_STATUS_CACHE_TTL = 2  # secondes
+PRINTER_STATUS_CACHE_MAX = 64  # Nombre maximal d'imprimantes suivies
+_printer_status_cache: Dict[Any, Tuple[float, Dict[str, Any]]] = {}  # nom -> (expiration, statut)
+
+
+def init_printer_manager() -> PrinterManager:
+    """Crée le gestionnaire d'impression à partir de la configuration (appelé au démarrage)"""
+    global printer_manager
+    # Convertir la configuration en dictionnaire
+    if config_manager.config:
+        config = {
+            "printing": {
+                "default_printer": config_manager.config.printing.default_printer,
+                "paper_size": config_manager.config.printing.paper_size,
+                "quality": config_manager.config.printing.quality,
+                "max_copies": config_manager.config.printing.max_copies,
+                "retry_attempts": config_manager.config.printing.retry_attempts,
+                "retry_delay": config_manager.config.printing.retry_delay
+            }
+        }
+    else:
+        config = {}
+    printer_manager = PrinterManager(config)
+    return printer_manager
 
 
 def get_printer_manager() -> PrinterManager:
     """Récupère l'instance du gestionnaire d'impression"""
-    global printer_manager
     if printer_manager is None:
-        # Convertir la configuration en dictionnaire
-        if config_manager.config:
-            config = {
-                "printing": {
-                    "default_printer": config_manager.config.printing.default_printer,
-                    "paper_size": config_manager.config.printing.paper_size,
-                    "quality": config_manager.config.printing.quality,
-                    "max_copies": config_manager.config.printing.max_copies,
-                    "retry_attempts": config_manager.config.printing.retry_attempts,
-                    "retry_delay": config_manager.config.printing.retry_delay
-                }
-            }
-        else:
-            config = {}
-        printer_manager = PrinterManager(config)
+        return init_printer_manager()
     return printer_manager
 
 
-def check_print_rate_limit(request: Request) -> bool:
-    """Vérifie le rate limiting pour l'impression"""
-    client_ip = request.client.host
-    current_time = time.time()
+def _check_print_rate_limit_redis(client_ip: str) -> bool:
+    """Rate limiting partagé via Redis (script Lua atomique)"""
+    global _print_rate_script
+    if _print_rate_script is None:
+        _print_rate_script = admin_auth.redis_client.register_script(PRINT_RATE_LIMIT_SCRIPT)
+    
+    window_index, elapsed = divmod(time.time(), print_rate_window)
+    allowed = _print_rate_script(
+        keys=[f"print_rate:{client_ip}:{int(window_index)}", f"print_rate:{client_ip}:{int(window_index) - 1}"],
+        args=[elapsed / print_rate_window, print_rate_limit, 2 * print_rate_window]
+    )
+    return bool(allowed)
+
+
+def sliding_window_admit(client_ip: str, now: float) -> bool:
+    """Admet une requête si le compte estimé sur la fenêtre glissante reste sous la limite
     
-    # Nettoyer les anciennes tentatives
-    if client_ip in print_attempts:
-        print_attempts[client_ip] = [t for t in print_attempts[client_ip] 
-                                    if current_time - t < print_rate_window]
+    Le compte de la fenêtre précédente est pondéré par la part de celle-ci
+    encore couverte par la fenêtre glissante.
+    """
+    window_index, elapsed = divmod(now, print_rate_window)
+    window_index = int(window_index)
     
-    # Vérifier la limite
-    if client_ip not in print_attempts:
-        print_attempts[client_ip] = []
+    with print_attempts_lock:
+        index, previous, current = print_attempts.get(client_ip, (window_index, 0, 0))
+        if index != window_index:
+            # La fenêtre courante devient la précédente (ou les deux ont expiré)
+            previous = current if index == window_index - 1 else 0
+            current = 0
+        
+        # Vérifier la limite
+        allowed = previous * (1 - elapsed / print_rate_window) + current < print_rate_limit
+        if allowed:
+            current += 1
+        
+        print_attempts[client_ip] = (window_index, previous, current)
+        print_attempts.move_to_end(client_ip)
+        
+        # Oublier les IP les moins récemment vues au-delà de la limite
+        if len(print_attempts) > print_rate_max_clients:
+            print_attempts.popitem(last=False)
     
-    if len(print_attempts[client_ip]) >= print_rate_limit:
-        return False
+    return allowed
+
+
+async def check_print_rate_limit(request: Request) -> bool:
+    """Vérifie le rate limiting pour l'impression (Redis si disponible, sinon en mémoire)"""
+    client_ip = request.client.host
+    
+    if admin_auth.use_redis and admin_auth.redis_client:
+        try:
+            # Client Redis synchrone: appel dans un thread pour ne pas bloquer la boucle
+            return await asyncio.to_thread(_check_print_rate_limit_redis, client_ip)
+        except Exception as e:
+            logger.warning(f"Rate limiting Redis indisponible, utilisation du stockage en mémoire: {e}")
     
-    # Ajouter la tentative actuelle
-    print_attempts[client_ip].append(current_time)
-    return True
+    return sliding_window_admit(client_ip, time.monotonic())
 
 
 @router.get("/printers", response_model=PrintersResponse)
 async def get_printers():
     """Récupère la liste des imprimantes disponibles"""
     try:
+        now = time.monotonic()
+        if _printers_cache["body"] is not None and now < _printers_cache["expires_at"]:
+            return Response(content=_printers_cache["body"], media_type="application/json")
+        
+        # Énumération dans un thread (win32print / lpstat sont bloquants)
         printer_mgr = get_printer_manager()
-        printers = printer_mgr.get_available_printers()
-        default_printer = printer_mgr.get_default_printer()
+        printers = await asyncio.to_thread(printer_mgr.get_available_printers)
+        default_printer = await asyncio.to_thread(printer_mgr.get_default_printer)
         
         # Conversion en modèles Pydantic
         printer_models = [
@@ -89,10 +176,13 @@ async def get_printers():
             for p in printers
         ]
         
-        return PrintersResponse(
+        body = PrintersResponse(
             printers=printer_models,
             default_printer=default_printer
-        )
+        ).model_dump_json()
+        _printers_cache["body"] = body
+        _printers_cache["expires_at"] = now + PRINTERS_CACHE_TTL
+        return Response(content=body, media_type="application/json")
         
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des imprimantes: {e}")
@@ -106,8 +196,18 @@ async def get_printers():
 async def get_printer_status(printer_name: str = None):
     """Récupère le statut d'une imprimante"""
     try:
+        now = time.monotonic()
+        cached = _printer_status_cache.get(printer_name)
+        if cached is not None and now < cached[0]:
+            return cached[1]
+        
+        # Interrogation dans un thread (win32print / lpstat sont bloquants)
         printer_mgr = get_printer_manager()
-        status = printer_mgr.get_printer_status(printer_name)
+        status = await asyncio.to_thread(printer_mgr.get_printer_status, printer_name)
+        
+        if len(_printer_status_cache) >= PRINTER_STATUS_CACHE_MAX:
+            _printer_status_cache.clear()
+        _printer_status_cache[printer_name] = (now + PRINTER_STATUS_CACHE_TTL, status)
         return status
         
     except Exception as e:
@@ -126,10 +226,11 @@ async def print_photo(
     """Imprime une photo avec gestion des erreurs et retry"""
     
     # Vérification du rate limiting
-    if not check_print_rate_limit(http_request):
+    if not await check_print_rate_limit(http_request):
         raise HTTPException(
             status_code=429,
-            detail=f"Trop de demandes d'impression. Limite: {print_rate_limit} par minute"
+            detail=f"Trop de demandes d'impression. Limite: {print_rate_limit} par minute",
+            headers={"Retry-After": str(math.ceil(print_rate_window / print_rate_limit))}
         )
     
     try:
@@ -148,12 +249,27 @@ async def print_photo(
                 detail="Nombre de copies invalide (1-10)"
             )
         
-        # Impression
-        result = printer_mgr.print_photo(
-            request.photo_path,
-            request.copies,
-            request.printer_name
-        )
+        # Attendre une place libre dans la file d'impression
+        try:
+            await asyncio.wait_for(print_semaphore.acquire(), timeout=print_queue_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("File d'impression saturée, demande rejetée")
+            raise HTTPException(
+                status_code=503,
+                detail="File d'impression saturée, veuillez réessayer",
+                headers={"Retry-After": str(math.ceil(print_queue_timeout))}
+            )
+        
+        # Impression dans un thread pour ne pas bloquer la boucle d'événements
+        try:
+            result = await asyncio.to_thread(
+                printer_mgr.print_photo,
+                request.photo_path,
+                request.copies,
+                request.printer_name
+            )
+        finally:
+            print_semaphore.release()
         
         if result["success"]:
             return PrintResponse(
@@ -1,13 +1,14 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Request
 from fastapi.responses import JSONResponse
 from loguru import logger
 from pathlib import Path
 import os
-from datetime import datetime
+import time
 import shutil
 import aiofiles
-from typing import List
+from typing import List, Optional
 import hashlib
+import uuid
 from ..config import config_manager
 
 router = APIRouter(prefix="/upload", tags=["upload"])
@@ -29,27 +30,45 @@ FILE_SIGNATURES = {
     b'RIFF': '.webp',  # WebP
 }
 
-async def validate_file(file: UploadFile) -> bool:
-    """Valide un fichier uploadé de manière sécurisée"""
+# Signatures regroupées par longueur (de la plus longue à la plus courte):
+# une recherche dans un dict par longueur remplace le parcours de toutes les signatures
+SIGNATURES_BY_LENGTH = tuple(
+    (length, {sig: ext for sig, ext in FILE_SIGNATURES.items() if len(sig) == length})
+    for length in sorted({len(sig) for sig in FILE_SIGNATURES}, reverse=True)
+)
+
+# Dossier de destination des photos (créé au démarrage de l'application)
+UPLOADS_DIR = Path("uploads")
+
+# Nombre d'octets lus pour détecter la signature
+SIGNATURE_READ_SIZE = 32
+
+# Taille des blocs lus lors de l'enregistrement d'un upload
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Marge tolérée sur Content-Length pour l'enveloppe multipart (en-têtes, séparateurs)
+MULTIPART_OVERHEAD = 16 * 1024
+
+DEFAULT_MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB par défaut
+
+def detect_file_extension(head: bytes) -> Optional[str]:
+    """Détermine l'extension d'un fichier à partir de ses premiers octets"""
+    for length, signatures in SIGNATURES_BY_LENGTH:
+        ext = signatures.get(head[:length])
+        if ext:
+            return ext
+    return None
+
+def validate_file(file: UploadFile, head: bytes) -> bool:
+    """Valide un fichier uploadé de manière sécurisée à partir de ses premiers octets"""
     try:
-        logger.info(f"Validation du fichier: {file.filename}, type: {file.content_type}")
-        
-        # Vérification de la taille
-        max_size = config_manager.config.storage.max_file_size if config_manager.config else 10 * 1024 * 1024  # 10MB par défaut
-        
-        # Lire les premiers bytes pour vérifier la signature
-        content = await file.read(32)  # Lire les 32 premiers bytes
-        await file.seek(0)  # Remettre le curseur au début
-        
-        logger.info(f"Premiers bytes: {content[:16].hex()}")
+        logger.debug("Validation du fichier: {}, type: {}", file.filename, file.content_type)
+        logger.opt(lazy=True).debug("Premiers bytes: {}", lambda: head[:16].hex())
         
         # Vérifier la signature du fichier
-        file_extension = None
-        for signature, ext in FILE_SIGNATURES.items():
-            if content.startswith(signature):
-                file_extension = ext
-                logger.info(f"Signature trouvée: {ext}")
-                break
+        file_extension = detect_file_extension(head)
+        if file_extension:
+            logger.debug("Signature trouvée: {}", file_extension)
         
         if not file_extension:
             logger.warning(f"Signature de fichier invalide pour {file.filename}")
@@ -61,15 +80,15 @@ async def validate_file(file: UploadFile) -> bool:
             if filename_extension and filename_extension != file_extension:
                 logger.warning(f"Extension de fichier ne correspond pas à la signature: {file.filename} vs {file_extension}")
                 # Au lieu de rejeter, on peut être plus tolérant
-                logger.info(f"Extension ignorée, utilisation de la signature: {file_extension}")
+                logger.debug("Extension ignorée, utilisation de la signature: {}", file_extension)
         
         # Vérifier le type MIME seulement s'il est fourni
         if file.content_type and file.content_type not in ALLOWED_MIME_TYPES:
             logger.warning(f"Type MIME non autorisé: {file.content_type}")
             # Au lieu de rejeter, on peut être plus tolérant
-            logger.info(f"Type MIME ignoré, utilisation de la signature: {file_extension}")
+            logger.debug("Type MIME ignoré, utilisation de la signature: {}", file_extension)
         
-        logger.info(f"Fichier validé avec succès: {file.filename}")
+        logger.debug("Fichier validé avec succès: {}", file.filename)
         return True
         
     except Exception as e:
@@ -77,13 +96,29 @@ async def validate_file(file: UploadFile) -> bool:
         return False
 
 @router.post("/photo")
-async def upload_photo(photo: UploadFile = File(...)):
+async def upload_photo(request: Request, photo: UploadFile = File(...)):
     """Upload d'une photo depuis le photobooth avec validation sécurisée"""
     try:
-        logger.info(f"Tentative d'upload: {photo.filename}, type: {photo.content_type}, taille: {photo.size if hasattr(photo, 'size') else 'inconnue'}")
+        logger.debug("Tentative d'upload: {}, type: {}", photo.filename, photo.content_type)
+        
+        # Rejeter d'emblée les requêtes annoncées trop volumineuses
+        max_size = config_manager.config.storage.max_file_size if config_manager.config else DEFAULT_MAX_FILE_SIZE
+        try:
+            content_length = int(request.headers.get("content-length", 0))
+        except ValueError:
+            content_length = 0
+        if content_length > max_size + MULTIPART_OVERHEAD:
+            logger.warning(f"Upload refusé, taille annoncée trop grande: {content_length} bytes")
+            raise HTTPException(
+                status_code=413,
+                detail=f"Fichier trop volumineux (maximum {max_size} bytes)"
+            )
+        
+        # Lire l'en-tête une seule fois: il sert à la validation et à l'extension
+        head = await photo.read(SIGNATURE_READ_SIZE)
         
         # Validation du fichier
-        if not await validate_file(photo):
+        if not validate_file(photo, head):
             logger.error(f"Validation échouée pour {photo.filename}")
             raise HTTPException(
                 status_code=400, 
@@ -98,50 +133,61 @@ async def upload_photo(photo: UploadFile = File(...)):
                 detail="Le fichier doit être une image"
             )
         
-        # Créer le dossier uploads s'il n'existe pas
-        uploads_dir = Path("uploads")
-        uploads_dir.mkdir(exist_ok=True)
-        
         # Générer un nom de fichier unique avec hash
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
         
         # Déterminer l'extension du fichier
         if photo.filename and Path(photo.filename).suffix:
             file_extension = Path(photo.filename).suffix
         else:
             # Utiliser l'extension basée sur la signature du fichier
-            content_for_signature = await photo.read(32)
-            await photo.seek(0)
-            
-            detected_extension = None
-            for signature, ext in FILE_SIGNATURES.items():
-                if content_for_signature.startswith(signature):
-                    detected_extension = ext
-                    break
-            
-            file_extension = detected_extension or '.jpg'  # Par défaut .jpg
-        
-        # Créer un hash du contenu pour éviter les doublons
-        content = await photo.read()
-        file_hash = hashlib.md5(content).hexdigest()[:8]
-        filename = f"photobooth_{timestamp}_{file_hash}{file_extension}"
-        
-        # Chemin complet du fichier
-        file_path = uploads_dir / filename
+            file_extension = detect_file_extension(head) or '.jpg'  # Par défaut .jpg
         
-        # Sauvegarder le fichier de manière asynchrone
+        # Écrire l'upload par blocs dans un fichier temporaire en calculant le hash au passage
+        temp_path = UPLOADS_DIR / f".upload_{uuid.uuid4().hex}.tmp"
+        file_hasher = hashlib.blake2b(digest_size=4)
+        file_size = 0
         try:
-            async with aiofiles.open(file_path, "wb") as buffer:
-                await buffer.write(content)
+            try:
+                buffer = await aiofiles.open(temp_path, "wb")
+            except FileNotFoundError:
+                # Dossier supprimé pendant l'exécution: le recréer
+                UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+                buffer = await aiofiles.open(temp_path, "wb")
+            
+            try:
+                chunk = head
+                while chunk:
+                    # Content-Length peut mentir: vérifier aussi la taille réellement reçue
+                    file_size += len(chunk)
+                    if file_size > max_size:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"Fichier trop volumineux (maximum {max_size} bytes)"
+                        )
+                    file_hasher.update(chunk)
+                    await buffer.write(chunk)
+                    chunk = await photo.read(UPLOAD_CHUNK_SIZE)
+            finally:
+                await buffer.close()
+            
+            # Nommer le fichier d'après le hash du contenu (pour éviter les doublons)
+            file_hash = file_hasher.hexdigest()
+            filename = f"photobooth_{timestamp}_{file_hash}{file_extension}"
+            file_path = UPLOADS_DIR / filename
+            os.replace(temp_path, file_path)
+        except HTTPException:
+            temp_path.unlink(missing_ok=True)
+            raise
         except Exception as e:
-            logger.error(f"Erreur lors de la sauvegarde du fichier {filename}: {e}")
+            temp_path.unlink(missing_ok=True)
+            logger.error(f"Erreur lors de la sauvegarde de la photo: {e}")
             raise HTTPException(
                 status_code=500, 
                 detail="Erreur lors de la sauvegarde de la photo"
             )
         
         # Log de la sauvegarde
-        file_size = file_path.stat().st_size
         logger.info(f"Photo sauvegardée: {filename} ({file_size} bytes) - Hash: {file_hash}")
         
         return JSONResponse({
@@ -1,10 +1,18 @@
 import os
 import shutil
+import stat
+from fnmatch import fnmatch
 from pathlib import Path
 from typing import List, Optional, Tuple
 from loguru import logger
 from ..config import config_manager
 
+# Taille du tampon de copie des fichiers (si sendfile n'est pas disponible)
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Nombre de tentatives pour trouver un nom de fichier libre
+UNIQUE_NAME_ATTEMPTS = 5
+
 
 class FileStorage:
     """Gestionnaire de stockage des fichiers pour le photobooth"""
@@ -15,6 +23,11 @@ class FileStorage:
         self.max_file_size = self.config.max_file_size
         self.allowed_extensions = self.config.allowed_extensions
         
+        # Cache des noms de fichiers du dossier d'upload (invalidé par le mtime du dossier,
+        # et vidé explicitement à chaque sauvegarde ou suppression)
+        self._names_cache: List[str] = []
+        self._names_cache_mtime = -1
+        
         # Créer le dossier d'upload s'il n'existe pas
         self._ensure_upload_dir()
     
@@ -60,11 +73,18 @@ class FileStorage:
                 logger.warning(f"Fichier rejeté: {message}")
                 return None
             
-            # Créer un nom de fichier unique
-            target_path = self._get_unique_filename(filename)
+            # Créer le fichier cible sous un nom unique
+            target_path, fd = self._open_unique_file(filename)
             
             # Copier le fichier
-            shutil.copy2(source_path, target_path)
+            try:
+                with os.fdopen(fd, "wb") as dst, open(source_path, "rb") as src:
+                    self._copy_contents(src, dst)
+                shutil.copystat(source_path, target_path)
+            except Exception:
+                target_path.unlink(missing_ok=True)
+                raise
+            self._names_cache_mtime = -1
             logger.info(f"Fichier sauvegardé: {target_path}")
             
             return target_path
@@ -73,39 +93,72 @@ class FileStorage:
             logger.error(f"Erreur lors de la sauvegarde du fichier: {e}")
             return None
     
-    def _get_unique_filename(self, filename: str) -> Path:
-        """Génère un nom de fichier unique"""
+    @staticmethod
+    def _copy_contents(src, dst) -> None:
+        """Copie le contenu d'un fichier ouvert vers un autre
+        
+        Sous Linux, os.sendfile copie directement dans le noyau sans passer par
+        un tampon Python; sinon on copie par blocs de COPY_BUFFER_SIZE.
+        """
+        if hasattr(os, "sendfile"):
+            size = os.fstat(src.fileno()).st_size
+            offset = 0
+            while offset < size:
+                try:
+                    sent = os.sendfile(dst.fileno(), src.fileno(), offset, size - offset)
+                except OSError:
+                    # sendfile non supporté pour ces fichiers: repli sur la copie classique
+                    if offset:
+                        raise
+                    break
+                if sent == 0:
+                    # Source raccourcie pendant la copie: ne jamais rendre une copie tronquée
+                    raise OSError(f"Copie incomplète: {offset}/{size} octets copiés")
+                offset += sent
+            else:
+                return
+        
+        shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+    
+    def _open_unique_file(self, filename: str) -> Tuple[Path, int]:
+        """Crée atomiquement un fichier au nom unique et retourne son chemin et son descripteur
+        
+        En cas de collision, un suffixe aléatoire est ajouté au nom: la création
+        exclusive (O_EXCL) évite que deux sauvegardes simultanées prennent le même nom.
+        """
         base_name = Path(filename).stem
         extension = Path(filename).suffix
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL
         
-        counter = 1
         target_path = self.upload_dir / filename
+        for _ in range(UNIQUE_NAME_ATTEMPTS):
+            try:
+                return target_path, os.open(target_path, flags, 0o644)
+            except FileExistsError:
+                target_path = self.upload_dir / f"{base_name}_{os.urandom(3).hex()}{extension}"
         
-        while target_path.exists():
-            new_filename = f"{base_name}_{counter}{extension}"
-            target_path = self.upload_dir / new_filename
-            counter += 1
-        
-        return target_path
+        raise FileExistsError(f"Impossible de trouver un nom de fichier libre pour {filename}")
     
     def delete_file(self, filename: str) -> bool:
         """Supprime un fichier du stockage"""
         try:
             file_path = self.upload_dir / filename
             
+            # Vérifier que le fichier est bien dans le dossier d'upload
+            # (liens symboliques et ".." résolus avant la comparaison)
+            real_path = os.path.realpath(file_path)
+            root = os.path.realpath(self.upload_dir)
+            if os.path.commonpath([real_path, root]) != root:
+                logger.error(f"Tentative d'accès à un fichier hors du dossier d'upload: {file_path}")
+                return False
+            
             # Vérification de sécurité
             if not file_path.exists():
                 logger.warning(f"Fichier introuvable: {file_path}")
                 return False
             
-            # Vérifier que le fichier est bien dans le dossier d'upload
-            try:
-                file_path.relative_to(self.upload_dir)
-            except ValueError:
-                logger.error(f"Tentative d'accès à un fichier hors du dossier d'upload: {file_path}")
-                return False
-            
             file_path.unlink()
+            self._names_cache_mtime = -1
             logger.info(f"Fichier supprimé: {file_path}")
             return True
             
@@ -113,13 +166,36 @@ class FileStorage:
             logger.error(f"Erreur lors de la suppression du fichier: {e}")
             return False
     
+    def _scan_files(self) -> List[Tuple[Path, os.stat_result]]:
+        """Liste les fichiers du dossier d'upload avec leur stat, du plus récent au plus ancien
+        
+        Seuls les noms sont mis en cache tant que le mtime du dossier ne change pas:
+        chaque fichier est stat() à chaque appel, un fichier réécrit sur place
+        (même nom) a donc toujours sa taille et sa date à jour.
+        """
+        dir_mtime = self.upload_dir.stat().st_mtime_ns
+        if dir_mtime != self._names_cache_mtime:
+            with os.scandir(self.upload_dir) as it:
+                self._names_cache = [entry.name for entry in it]
+            self._names_cache_mtime = dir_mtime
+        
+        entries = []
+        for name in self._names_cache:
+            path = self.upload_dir / name
+            try:
+                file_stat = path.stat()
+            except FileNotFoundError:
+                # Supprimé depuis le scan (horodatage du dossier trop grossier)
+                continue
+            if stat.S_ISREG(file_stat.st_mode):
+                entries.append((path, file_stat))
+        entries.sort(key=lambda item: item[1].st_mtime, reverse=True)
+        return entries
+    
     def list_files(self, pattern: str = "*") -> List[Path]:
         """Liste les fichiers dans le dossier d'upload"""
         try:
-            files = list(self.upload_dir.glob(pattern))
-            # Filtrer seulement les fichiers (pas les dossiers)
-            files = [f for f in files if f.is_file()]
-            return sorted(files, key=lambda x: x.stat().st_mtime, reverse=True)
+            return [path for path, _ in self._scan_files() if fnmatch(path.name, pattern)]
         except Exception as e:
             logger.error(f"Erreur lors de la liste des fichiers: {e}")
             return []
@@ -153,14 +229,20 @@ class FileStorage:
             max_age_seconds = max_age_days * 24 * 3600
             
             deleted_count = 0
-            files = self.list_files()
             
-            for file_path in files:
-                file_age = current_time - file_path.stat().st_mtime
+            # Parcourir du plus ancien au plus récent en réutilisant le stat du scan
+            for file_path, file_stat in reversed(self._scan_files()):
+                file_age = current_time - file_stat.st_mtime
                 
-                if file_age > max_age_seconds:
-                    if self.delete_file(file_path.name):
-                        deleted_count += 1
+                if file_age <= max_age_seconds:
+                    break
+                
+                # Le chemin vient du scan du dossier d'upload: pas besoin des contrôles de delete_file
+                try:
+                    os.unlink(file_path)
+                    deleted_count += 1
+                except OSError as e:
+                    logger.warning(f"Impossible de supprimer {file_path}: {e}")
             
             if deleted_count > 0:
                 logger.info(f"{deleted_count} anciens fichiers supprimés")
@@ -174,11 +256,11 @@ class FileStorage:
     def get_storage_stats(self) -> dict:
         """Récupère les statistiques du stockage"""
         try:
-            files = self.list_files()
-            total_size = sum(f.stat().st_size for f in files)
+            entries = self._scan_files()
+            total_size = sum(file_stat.st_size for _, file_stat in entries)
             
             return {
-                "total_files": len(files),
+                "total_files": len(entries),
                 "total_size": total_size,
                 "total_size_mb": round(total_size / (1024 * 1024), 2),
                 "upload_dir": str(self.upload_dir),
@@ -191,5 +273,13 @@ class FileStorage:
             return {}
 
 
-# Instance globale du gestionnaire de stockage
-file_storage = FileStorage()
+# Instance globale du gestionnaire de stockage (créée à la première utilisation)
+file_storage: Optional[FileStorage] = None
+
+
+def get_file_storage() -> FileStorage:
+    """Récupère l'instance du gestionnaire de stockage"""
+    global file_storage
+    if file_storage is None:
+        file_storage = FileStorage()
+    return file_storage
@@ -3,9 +3,19 @@
 Script pour créer une photo d'exemple pour la prévisualisation des cadres
 """
 
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
+import numpy as np
 import os
 
+@lru_cache(maxsize=4)
+def load_font(name: str, size: int):
+    """Charge une police système (mise en cache), avec repli sur la police par défaut"""
+    try:
+        return ImageFont.truetype(name, size)
+    except OSError:
+        return ImageFont.load_default()
+
 def create_sample_photo():
     """Crée une photo d'exemple simple"""
     
@@ -15,17 +25,17 @@ def create_sample_photo():
     # Dimensions de la photo
     width, height = 800, 600
     
-    # Créer une image avec un dégradé de fond
-    image = Image.new('RGB', (width, height))
+    # Créer une image avec un dégradé de fond (calculé en une passe avec NumPy)
+    y = (np.arange(height) / height)[:, None]
+    r = (100 + y * 100).astype(np.uint8)  # Rouge de 100 à 200
+    g = (150 + y * 50).astype(np.uint8)   # Vert de 150 à 200
+    b = (200 + y * 55).astype(np.uint8)   # Bleu de 200 à 255
+    # Colonne (height, 1, 3) étendue sur la largeur par une vue, copiée une seule fois
+    column = np.stack([r, g, b], axis=-1)
+    gradient = np.ascontiguousarray(np.broadcast_to(column, (height, width, 3)))
+    image = Image.fromarray(gradient, 'RGB')
     draw = ImageDraw.Draw(image)
     
-    # Créer un dégradé de fond
-    for y in range(height):
-        r = int(100 + (y / height) * 100)  # Rouge de 100 à 200
-        g = int(150 + (y / height) * 50)   # Vert de 150 à 200
-        b = int(200 + (y / height) * 55)   # Bleu de 200 à 255
-        draw.line([(0, y), (width, y)], fill=(r, g, b))
-    
     # Ajouter un cercle central
     center_x, center_y = width // 2, height // 2
     circle_radius = 150
@@ -34,12 +44,7 @@ def create_sample_photo():
                  fill=(255, 255, 255, 100), outline=(255, 255, 255, 200), width=3)
     
     # Ajouter du texte
-    try:
-        # Essayer d'utiliser une police système
-        font = ImageFont.truetype("arial.ttf", 48)
-    except:
-        # Fallback vers la police par défaut
-        font = ImageFont.load_default()
+    font = load_font("arial.ttf", 48)
     
     text = "PHOTO EXEMPLE"
     text_bbox = draw.textbbox((0, 0), text, font=font)
@@ -49,10 +54,15 @@ def create_sample_photo():
     text_x = (width - text_width) // 2
     text_y = center_y + circle_radius + 30
     
+    # Rasteriser le texte une seule fois dans un masque, réutilisé pour l'ombre et le texte
+    text_mask = Image.new('L', (text_width, text_height), 0)
+    ImageDraw.Draw(text_mask).text((-text_bbox[0], -text_bbox[1]), text, fill=255, font=font)
+    mask_x, mask_y = text_x + text_bbox[0], text_y + text_bbox[1]
+    
     # Ombre du texte
-    draw.text((text_x + 2, text_y + 2), text, fill=(0, 0, 0, 150), font=font)
+    image.paste((0, 0, 0), (mask_x + 2, mask_y + 2), text_mask)
     # Texte principal
-    draw.text((text_x, text_y), text, fill=(255, 255, 255, 255), font=font)
+    image.paste((255, 255, 255), (mask_x, mask_y), text_mask)
     
     # Ajouter quelques éléments décoratifs
     for i in range(5):
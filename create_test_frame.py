@@ -3,7 +3,8 @@
 Script pour créer un cadre de test PNG avec transparence
 """
 
-from PIL import Image, ImageDraw
+from PIL import Image
+import numpy as np
 import os
 
 def create_test_frame():
@@ -15,31 +16,37 @@ def create_test_frame():
     # Dimensions du cadre
     width, height = 400, 300
     
-    # Créer une image avec transparence
-    image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(image)
+    # Créer une image avec transparence (pixels RGBA manipulés par tranches NumPy)
+    pixels = np.zeros((height, width, 4), dtype=np.uint8)
     
     # Dessiner un cadre simple avec bordure
     border_width = 20
     
     # Bordure extérieure
-    draw.rectangle([0, 0, width-1, height-1], 
-                  outline=(255, 215, 0, 255),  # Or
-                  width=border_width)
+    gold = (255, 215, 0, 255)  # Or
+    pixels[:border_width] = gold
+    pixels[-border_width:] = gold
+    pixels[:, :border_width] = gold
+    pixels[:, -border_width:] = gold
     
     # Bordure intérieure
-    draw.rectangle([border_width, border_width, width-border_width-1, height-border_width-1], 
-                  outline=(255, 255, 255, 200),  # Blanc semi-transparent
-                  width=5)
+    inner_width = 5
+    white = (255, 255, 255, 200)  # Blanc semi-transparent
+    inner = pixels[border_width:-border_width, border_width:-border_width]
+    inner[:inner_width] = white
+    inner[-inner_width:] = white
+    inner[:, :inner_width] = white
+    inner[:, -inner_width:] = white
     
     # Ajouter un coin décoratif
     corner_size = 40
-    draw.rectangle([0, 0, corner_size, corner_size], 
-                  fill=(255, 215, 0, 180))  # Or semi-transparent
+    pixels[:corner_size + 1, :corner_size + 1] = (255, 215, 0, 180)  # Or semi-transparent
+    
+    image = Image.fromarray(pixels, 'RGBA')
     
     # Sauvegarder le cadre
     frame_path = "frames/test_frame.png"
-    image.save(frame_path, "PNG")
+    image.save(frame_path, "PNG", compress_level=1)  # Compression rapide: fichier de test régénéré à la demande
     
     print(f"Cadre de test créé : {frame_path}")
     print(f"Dimensions : {width}x{height} pixels")
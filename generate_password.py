@@ -3,24 +3,40 @@
 Script pour générer un hash bcrypt du mot de passe admin
 """
 
+import argparse
+import sys
+
 import bcrypt
 
-def generate_password_hash(password: str):
+# Coût bcrypt de production (même valeur par défaut que security.bcrypt_rounds)
+DEFAULT_ROUNDS = 12
+
+def generate_password_hash(password: str, rounds: int = DEFAULT_ROUNDS, verify: bool = False):
     """Génère un hash bcrypt du mot de passe"""
+    if rounds < 10:
+        print(f"⚠️  Coût bcrypt réduit ({rounds}): hash réservé au développement et aux tests", file=sys.stderr)
+    
     # Générer le hash
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt(12)
+    salt = bcrypt.gensalt(rounds)
     password_hash = bcrypt.hashpw(password_bytes, salt)
     
     print(f"Mot de passe: {password}")
     print(f"Hash bcrypt: {password_hash.decode('utf-8')}")
     
-    # Vérifier le hash
-    is_valid = bcrypt.checkpw(password_bytes, password_hash)
-    print(f"Vérification: {'✅ Valide' if is_valid else '❌ Invalide'}")
+    # Vérifier le hash (second calcul bcrypt complet, donc seulement sur demande)
+    if verify:
+        is_valid = bcrypt.checkpw(password_bytes, password_hash)
+        print(f"Vérification: {'✅ Valide' if is_valid else '❌ Invalide'}")
     
     return password_hash.decode('utf-8')
 
 if __name__ == "__main__":
-    # Générer le hash pour "admin"
-    generate_password_hash("admin")
+    parser = argparse.ArgumentParser(description="Génère un hash bcrypt du mot de passe admin")
+    parser.add_argument("password", nargs="?", default="admin", help="Mot de passe à hasher (défaut: admin)")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS,
+                        help=f"Coût bcrypt (défaut: {DEFAULT_ROUNDS}; 4 suffit pour le développement)")
+    parser.add_argument("--verify", action="store_true", help="Revérifier le hash généré avec bcrypt.checkpw")
+    args = parser.parse_args()
+    
+    generate_password_hash(args.password, args.rounds, args.verify)
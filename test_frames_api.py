@@ -3,9 +3,27 @@
 Script de test pour l'API des cadres
 """
 
-import requests
+from api_session import create_session
 import json
 
+try:
+    import ijson  # Lecture incrémentale des réponses JSON (optionnel)
+except ImportError:
+    ijson = None
+
+# Session HTTP partagée: une seule connexion keep-alive réutilisée par tous les appels
+session = create_session()
+
+def iter_frames(response):
+    """Parcourt les cadres de la réponse au fil de la lecture (ijson) ou après décodage complet"""
+    if ijson is None:
+        yield from response.json().get('frames', [])
+        return
+    
+    # Décompresser le flux (GZip) avant de le passer au parseur
+    response.raw.decode_content = True
+    yield from ijson.items(response.raw, 'frames.item')
+
 def test_frames_api():
     """Teste l'API des cadres"""
     base_url = "http://localhost:8000"
@@ -15,7 +33,7 @@ def test_frames_api():
     
     # 1. Test de santé
     try:
-        response = requests.get(f"{base_url}/health")
+        response = session.get(f"{base_url}/health")
         print(f"✅ Health check: {response.status_code}")
     except Exception as e:
         print(f"❌ Health check échoué: {e}")
@@ -28,7 +46,7 @@ def test_frames_api():
     }
     
     try:
-        response = requests.post(f"{base_url}/admin/login", json=login_data)
+        response = session.post(f"{base_url}/admin/login", json=login_data)
         if response.status_code == 200:
             result = response.json()
             if result.get("success"):
@@ -36,15 +54,18 @@ def test_frames_api():
                 session_token = result.get("token")
                 
                 # 3. Test de récupération des cadres
-                headers = {"Authorization": f"Bearer {session_token}"}
-                response = requests.get(f"{base_url}/admin/frames", headers=headers)
+                session.headers.update({"Authorization": f"Bearer {session_token}"})
+                response = session.get(f"{base_url}/admin/frames", stream=True)
                 
                 if response.status_code == 200:
-                    frames = response.json()
-                    print(f"✅ Récupération des cadres: {len(frames.get('frames', []))} cadres trouvés")
+                    print("✅ Récupération des cadres:")
                     
-                    for frame in frames.get('frames', []):
+                    frame_count = 0
+                    for frame in iter_frames(response):
+                        frame_count += 1
                         print(f"   - {frame['name']} ({frame['position']}) - {'✅ Actif' if frame['active'] else '🔘 Inactif'}")
+                    
+                    print(f"   {frame_count} cadres trouvés")
                 else:
                     print(f"❌ Erreur lors de la récupération des cadres: {response.status_code}")
                     print(response.text)
@@ -4,177 +4,204 @@ Script de test pour les fonctionnalités d'impression et d'email
 Teste les endpoints et la connectivité des services
 """
 
-import requests
+from api_session import create_session
 import json
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Configuration
 BASE_URL = "http://localhost:8000"
 TEST_PHOTO_PATH = "static/img/sample-photo.jpg"  # Photo de test
 
+# Session HTTP partagée: une seule connexion keep-alive réutilisée par tous les appels
+session = create_session()
+
+# Sortie mise de côté par section quand les sections s'exécutent en parallèle
+_output = threading.local()
+
+def log(*args):
+    """Affiche un message, ou le conserve si la section courante capture sa sortie"""
+    lines = getattr(_output, "lines", None)
+    if lines is None:
+        print(*args)
+    else:
+        lines.append(" ".join(str(arg) for arg in args))
+
+def run_section(section):
+    """Exécute une section de tests et retourne son résultat avec sa sortie"""
+    _output.lines = []
+    try:
+        return section(), _output.lines
+    finally:
+        _output.lines = None
+
 def test_health():
     """Test du healthcheck enrichi"""
-    print("🔍 Test du healthcheck...")
+    log("🔍 Test du healthcheck...")
     try:
-        response = requests.get(f"{BASE_URL}/health")
+        response = session.get(f"{BASE_URL}/health")
         if response.status_code == 200:
             data = response.json()
-            print(f"✅ Healthcheck OK - Status: {data['status']}")
-            print(f"   Caméra: {data['camera_status']['status']}")
-            print(f"   Disque: {data['disk_space'].get('free_gb', 'N/A')} GB libre")
-            print(f"   Imprimante: {data['printer_status']['available']}")
-            print(f"   Email: {data['email_status']['configured']}")
+            log(f"✅ Healthcheck OK - Status: {data['status']}")
+            log(f"   Caméra: {data['camera_status']['status']}")
+            log(f"   Disque: {data['disk_space'].get('free_gb', 'N/A')} GB libre")
+            log(f"   Imprimante: {data['printer_status']['available']}")
+            log(f"   Email: {data['email_status']['configured']}")
             return True
         else:
-            print(f"❌ Healthcheck échoué - Status: {response.status_code}")
+            log(f"❌ Healthcheck échoué - Status: {response.status_code}")
             return False
     except Exception as e:
-        print(f"❌ Erreur healthcheck: {e}")
+        log(f"❌ Erreur healthcheck: {e}")
         return False
 
 def test_printing():
     """Test des fonctionnalités d'impression"""
-    print("\n🖨️ Test des fonctionnalités d'impression...")
+    log("\n🖨️ Test des fonctionnalités d'impression...")
     
     # Test 1: Lister les imprimantes
     try:
-        response = requests.get(f"{BASE_URL}/print/printers")
+        response = session.get(f"{BASE_URL}/print/printers")
         if response.status_code == 200:
             data = response.json()
-            print(f"✅ Imprimantes trouvées: {len(data['printers'])}")
+            log(f"✅ Imprimantes trouvées: {len(data['printers'])}")
             for printer in data['printers']:
-                print(f"   - {printer['name']} ({printer['platform']})")
+                log(f"   - {printer['name']} ({printer['platform']})")
             if data['default_printer']:
-                print(f"   Imprimante par défaut: {data['default_printer']}")
+                log(f"   Imprimante par défaut: {data['default_printer']}")
         else:
-            print(f"❌ Erreur récupération imprimantes: {response.status_code}")
+            log(f"❌ Erreur récupération imprimantes: {response.status_code}")
     except Exception as e:
-        print(f"❌ Erreur test imprimantes: {e}")
+        log(f"❌ Erreur test imprimantes: {e}")
     
     # Test 2: Statut d'impression
     try:
-        response = requests.get(f"{BASE_URL}/print/test")
+        response = session.get(f"{BASE_URL}/print/test")
         if response.status_code == 200:
             data = response.json()
-            print(f"✅ Test impression: {data['status']}")
-            print(f"   Support Windows: {data.get('windows_support', False)}")
-            print(f"   Support Unix: {data.get('unix_support', False)}")
+            log(f"✅ Test impression: {data['status']}")
+            log(f"   Support Windows: {data.get('windows_support', False)}")
+            log(f"   Support Unix: {data.get('unix_support', False)}")
         else:
-            print(f"❌ Erreur test impression: {response.status_code}")
+            log(f"❌ Erreur test impression: {response.status_code}")
     except Exception as e:
-        print(f"❌ Erreur test impression: {e}")
+        log(f"❌ Erreur test impression: {e}")
     
     # Test 3: Impression (si photo de test disponible)
     if Path(TEST_PHOTO_PATH).exists():
         try:
-            print(f"📸 Test impression avec {TEST_PHOTO_PATH}...")
-            response = requests.post(f"{BASE_URL}/print/photo", json={
+            log(f"📸 Test impression avec {TEST_PHOTO_PATH}...")
+            response = session.post(f"{BASE_URL}/print/photo", json={
                 "photo_path": TEST_PHOTO_PATH,
                 "copies": 1
             })
             if response.status_code == 200:
                 data = response.json()
                 if data['success']:
-                    print(f"✅ Impression lancée: {data['message']}")
+                    log(f"✅ Impression lancée: {data['message']}")
                 else:
-                    print(f"⚠️ Impression échouée: {data['error']}")
+                    log(f"⚠️ Impression échouée: {data['error']}")
             else:
-                print(f"❌ Erreur impression: {response.status_code}")
+                log(f"❌ Erreur impression: {response.status_code}")
         except Exception as e:
-            print(f"❌ Erreur test impression: {e}")
+            log(f"❌ Erreur test impression: {e}")
     else:
-        print(f"⚠️ Photo de test non trouvée: {TEST_PHOTO_PATH}")
+        log(f"⚠️ Photo de test non trouvée: {TEST_PHOTO_PATH}")
 
 def test_email():
     """Test des fonctionnalités d'email"""
-    print("\n📧 Test des fonctionnalités d'email...")
+    log("\n📧 Test des fonctionnalités d'email...")
     
     # Test 1: Consentement RGPD
     try:
-        response = requests.get(f"{BASE_URL}/email/gdpr-consent")
+        response = session.get(f"{BASE_URL}/email/gdpr-consent")
         if response.status_code == 200:
             data = response.json()
-            print(f"✅ Consentement RGPD: {data['required']}")
-            print(f"   Rétention: {data['retention_days']} jours")
+            log(f"✅ Consentement RGPD: {data['required']}")
+            log(f"   Rétention: {data['retention_days']} jours")
             if data['consent_text']:
-                print(f"   Texte: {data['consent_text'][:100]}...")
+                log(f"   Texte: {data['consent_text'][:100]}...")
         else:
-            print(f"❌ Erreur consentement RGPD: {response.status_code}")
+            log(f"❌ Erreur consentement RGPD: {response.status_code}")
     except Exception as e:
-        print(f"❌ Erreur test consentement: {e}")
+        log(f"❌ Erreur test consentement: {e}")
     
     # Test 2: Statut email
     try:
-        response = requests.get(f"{BASE_URL}/email/status")
+        response = session.get(f"{BASE_URL}/email/status")
         if response.status_code == 200:
             data = response.json()
-            print(f"✅ Statut email: {data['configured']}")
+            log(f"✅ Statut email: {data['configured']}")
             if data['configured']:
-                print(f"   Serveur: {data['smtp_server']}:{data['smtp_port']}")
-                print(f"   Expéditeur: {data['from_email']}")
-                print(f"   RGPD requis: {data['gdpr_required']}")
+                log(f"   Serveur: {data['smtp_server']}:{data['smtp_port']}")
+                log(f"   Expéditeur: {data['from_email']}")
+                log(f"   RGPD requis: {data['gdpr_required']}")
             else:
-                print("   ⚠️ Service email non configuré")
+                log("   ⚠️ Service email non configuré")
         else:
-            print(f"❌ Erreur statut email: {response.status_code}")
+            log(f"❌ Erreur statut email: {response.status_code}")
     except Exception as e:
-        print(f"❌ Erreur test statut email: {e}")
+        log(f"❌ Erreur test statut email: {e}")
     
     # Test 3: Test de connectivité
     try:
-        response = requests.get(f"{BASE_URL}/email/test")
+        response = session.get(f"{BASE_URL}/email/test")
         if response.status_code == 200:
             data = response.json()
-            print(f"✅ Test email: {data['status']}")
+            log(f"✅ Test email: {data['status']}")
             if 'rate_limit' in data:
-                print(f"   Rate limit: {data['rate_limit']['current_count']}/{data['rate_limit']['max_emails']}")
+                log(f"   Rate limit: {data['rate_limit']['current_count']}/{data['rate_limit']['max_emails']}")
         else:
-            print(f"❌ Erreur test email: {response.status_code}")
+            log(f"❌ Erreur test email: {response.status_code}")
     except Exception as e:
-        print(f"❌ Erreur test connectivité email: {e}")
+        log(f"❌ Erreur test connectivité email: {e}")
     
     # Test 4: Validation email
     try:
         test_emails = ["test@example.com", "invalid-email", "user@domain.co.uk"]
+        # Requêtes en série: la section tourne déjà en parallèle des autres, et le pool
+        # de la session (une connexion par section) ne doit pas être dépassé
         for email in test_emails:
-            response = requests.post(f"{BASE_URL}/email/validate-email", data=email)
+            response = session.post(f"{BASE_URL}/email/validate-email", params={"email": email})
             if response.status_code == 200:
                 data = response.json()
                 status = "✅" if data['valid'] else "❌"
-                print(f"   {status} {email}: {data['valid']}")
+                log(f"   {status} {email}: {data['valid']}")
             else:
-                print(f"   ❌ {email}: Erreur validation")
+                log(f"   ❌ {email}: Erreur validation")
     except Exception as e:
-        print(f"❌ Erreur test validation email: {e}")
+        log(f"❌ Erreur test validation email: {e}")
 
 def test_detailed_health():
     """Test du healthcheck détaillé"""
-    print("\n📊 Test du healthcheck détaillé...")
+    log("\n📊 Test du healthcheck détaillé...")
     try:
-        response = requests.get(f"{BASE_URL}/health/detailed")
+        response = session.get(f"{BASE_URL}/health/detailed")
         if response.status_code == 200:
             data = response.json()
-            print(f"✅ Healthcheck détaillé OK")
-            print(f"   Uptime: {data['uptime_formatted']}")
-            print(f"   Composants: {len(data['components'])}")
+            log(f"✅ Healthcheck détaillé OK")
+            log(f"   Uptime: {data['uptime_formatted']}")
+            log(f"   Composants: {len(data['components'])}")
             for name, component in data['components'].items():
                 status = "✅" if component.get('available', False) else "❌"
-                print(f"   {status} {name}: {component.get('status', 'N/A')}")
+                log(f"   {status} {name}: {component.get('status', 'N/A')}")
         else:
-            print(f"❌ Healthcheck détaillé échoué: {response.status_code}")
+            log(f"❌ Healthcheck détaillé échoué: {response.status_code}")
     except Exception as e:
-        print(f"❌ Erreur healthcheck détaillé: {e}")
+        log(f"❌ Erreur healthcheck détaillé: {e}")
 
 def main():
     """Fonction principale de test"""
     print("🚀 Test des fonctionnalités Photobooth - Impression et Email")
     print("=" * 60)
     
-    # Vérifier la connectivité de base
+    # Vérifier la connectivité de base (HEAD: seul le code de statut compte, pas de corps)
+    # FastAPI ne dérive pas HEAD des routes GET: 405 prouve aussi que le serveur répond
     try:
-        response = requests.get(f"{BASE_URL}/health", timeout=5)
-        if response.status_code != 200:
+        response = session.head(f"{BASE_URL}/health/", timeout=5)
+        if response.status_code not in (200, 405):
             print(f"❌ Serveur non accessible: {response.status_code}")
             sys.exit(1)
     except Exception as e:
@@ -182,11 +209,15 @@ def main():
         print(f"   Vérifiez que le serveur est démarré sur {BASE_URL}")
         sys.exit(1)
     
-    # Tests
-    health_ok = test_health()
-    test_printing()
-    test_email()
-    test_detailed_health()
+    # Tests: sections indépendantes exécutées en parallèle, sorties affichées dans l'ordre
+    # (pas plus de sections que de connexions du pool de la session, pool_maxsize=4)
+    sections = (test_health, test_printing, test_email, test_detailed_health)
+    with ThreadPoolExecutor(max_workers=len(sections)) as executor:
+        results = list(executor.map(run_section, sections))
+    
+    for _, lines in results:
+        print("\n".join(lines))
+    health_ok = results[0][0]
     
     print("\n" + "=" * 60)
     if health_ok:
@@ -0,0 +1,11 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Client de test partagé par toute la session (démarrage de l'application une seule fois)"""
+    # Hôte explicite: "testserver" n'est pas dans les hôtes autorisés par TrustedHostMiddleware
+    with TestClient(app, base_url="http://localhost") as test_client:
+        yield test_client
@@ -0,0 +1,176 @@
+import json
+import os
+import struct
+
+import pytest
+
+from app.main import app
+from app.routes import frames
+from app.routes.auth import get_current_admin
+
+
+def _png(width: int = 4, height: int = 3, chunk_type: bytes = b"IHDR") -> bytes:
+    """En-tête PNG minimal (signature + début du chunk IHDR)"""
+    return frames.PNG_SIGNATURE + struct.pack(">I", 13) + chunk_type + struct.pack(">II", width, height) + b"\0" * 16
+
+
+def _frame(frame_id: str, active: bool = False) -> dict:
+    """Entrée de configuration d'un cadre"""
+    return {"id": frame_id, "name": frame_id, "filename": f"{frame_id}.png", "active": active}
+
+
+@pytest.fixture
+def frames_env(tmp_path, monkeypatch):
+    """Dossier et configuration des cadres temporaires, cache vide et admin authentifié"""
+    frames_dir = tmp_path / "frames"
+    frames_dir.mkdir()
+    config_file = tmp_path / "frames.json"
+    monkeypatch.setattr(frames, "FRAMES_DIR", frames_dir)
+    monkeypatch.setattr(frames, "FRAMES_CONFIG_FILE", config_file)
+    monkeypatch.setattr(frames, "_frames_cache", {"mtime": None, "data": None, "raw": None, "by_id": {}, "active": None})
+    app.dependency_overrides[get_current_admin] = lambda: {"username": "test"}
+    yield config_file
+    app.dependency_overrides.pop(get_current_admin, None)
+
+
+def _write_config(config_file, *entries):
+    """Écrit la configuration des cadres comme le ferait une édition manuelle"""
+    config_file.write_text(json.dumps({"frames": list(entries)}), encoding="utf-8")
+
+
+def _assert_cache_consistent():
+    """Vérifie que l'index et le pointeur du cadre actif désignent la liste en cache"""
+    cache = frames._frames_cache
+    current = cache["data"]["frames"]
+    assert all(any(frame is entry for entry in current) for frame in cache["by_id"].values())
+    assert len(cache["by_id"]) == len(current)
+    active = [frame for frame in current if frame.get("active")]
+    assert len(active) <= 1
+    assert cache["active"] is (active[0] if active else None)
+
+
+class TestFramesConfigCache:
+    """Tests du cache de la configuration des cadres"""
+
+    def test_external_edit_is_picked_up(self, client, frames_env):
+        """Test de la prise en compte d'une modification du fichier (mtime modifié)"""
+        _write_config(frames_env, _frame("a", active=True))
+        assert [f["id"] for f in client.get("/admin/frames/").json()["frames"]] == ["a"]
+
+        _write_config(frames_env, _frame("a"), _frame("b", active=True))
+        stat = frames_env.stat()
+        os.utime(frames_env, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        assert [f["id"] for f in client.get("/admin/frames/").json()["frames"]] == ["a", "b"]
+        assert client.get("/admin/frames/active").json()["frame"]["id"] == "b"
+
+    def test_pointers_follow_current_list(self, client, frames_env):
+        """Test de l'index et du cadre actif après activation, création et suppression"""
+        _write_config(frames_env, _frame("a", active=True), _frame("b"))
+        client.get("/admin/frames/")
+        _assert_cache_consistent()
+
+        assert client.post("/admin/frames/b/toggle").status_code == 200
+        _assert_cache_consistent()
+        assert frames.current_active_frame()["id"] == "b"
+
+        response = client.post(
+            "/admin/frames/",
+            data={"name": "c", "active": "true"},
+            files={"file": ("c.png", _png(), "image/png")}
+        )
+        assert response.status_code == 200
+        new_id = response.json()["frame"]["id"]
+        _assert_cache_consistent()
+        assert frames.current_active_frame()["id"] == new_id
+
+        assert client.delete(f"/admin/frames/{new_id}").status_code == 200
+        _assert_cache_consistent()
+        assert frames.get_frame_by_id(new_id) is None
+        assert frames.current_active_frame() is None
+
+    def test_failed_replace_leaves_cache_and_file_unchanged(self, client, frames_env, monkeypatch):
+        """Test d'un échec de os.replace: ni le fichier ni le cache ne changent"""
+        _write_config(frames_env, _frame("a", active=True), _frame("b"))
+        client.get("/admin/frames/")
+        original = frames_env.read_bytes()
+        cached = frames._frames_cache["data"]
+
+        def failing_replace(src, dst):
+            raise OSError("disque plein")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(frames.os, "replace", failing_replace)
+            assert client.post("/admin/frames/b/toggle").status_code == 500
+
+        assert frames_env.read_bytes() == original
+        assert frames._frames_cache["data"] is cached
+        assert frames.current_active_frame()["id"] == "a"
+        assert not frames_env.with_suffix(".json.tmp").exists()
+
+        # Relecture depuis le disque: toujours l'ancienne configuration
+        assert client.get("/admin/frames/active").json()["frame"]["id"] == "a"
+
+    def test_multiple_active_frames_are_repaired(self, client, frames_env):
+        """Test de la réparation d'une configuration avec deux cadres actifs"""
+        _write_config(frames_env, _frame("a", active=True), _frame("b", active=True))
+
+        data = client.get("/admin/frames/").json()
+        assert [f["id"] for f in data["frames"] if f.get("active")] == ["a"]
+        assert client.get("/admin/frames/active").json()["frame"]["id"] == "a"
+        _assert_cache_consistent()
+
+    def test_json_fallback_writes_same_bytes(self, monkeypatch):
+        """Test du format identique avec et sans orjson (dépendance optionnelle)"""
+        if frames.orjson is None:
+            pytest.skip("orjson non installé")
+        config = {"frames": [{**_frame("a", active=True), "name": "Cadre été", "size": 100}]}
+        with_orjson = frames._dumps_frames(config)
+
+        monkeypatch.setattr(frames, "orjson", None)
+        assert frames._dumps_frames(config) == with_orjson
+        assert frames._loads_frames(with_orjson) == config
+
+    def test_identical_content_is_not_rewritten(self, frames_env):
+        """Test de l'absence d'écriture quand le contenu sauvegardé est identique"""
+        frames.save_frames_config({"frames": [_frame("a", active=True)]})
+        # mtime ancien: une réécriture le modifierait forcément
+        os.utime(frames_env, ns=(0, 1_000_000_000))
+
+        config = frames.load_frames_config()
+        assert frames.save_frames_config({**config, "frames": list(config["frames"])})
+        assert frames_env.stat().st_mtime_ns == 1_000_000_000
+
+
+class TestCreateFrameValidation:
+    """Tests de la validation des fichiers PNG à la création d'un cadre"""
+
+    @pytest.mark.parametrize("content", [
+        b"GIF89a" + b"\0" * 32,
+        _png(chunk_type=b"IDAT"),
+        frames.PNG_SIGNATURE,
+    ])
+    def test_rejects_invalid_png(self, client, frames_env, content):
+        """Test du refus d'un fichier qui n'est pas un PNG ou dont l'IHDR est invalide"""
+        response = client.post(
+            "/admin/frames/",
+            data={"name": "invalide"},
+            files={"file": ("cadre.png", content, "image/png")}
+        )
+
+        assert response.status_code == 400
+        assert list(frames.FRAMES_DIR.iterdir()) == []
+        assert not frames_env.exists()
+
+    def test_reads_dimensions_from_ihdr(self, client, frames_env):
+        """Test de la lecture des dimensions dans l'en-tête IHDR"""
+        response = client.post(
+            "/admin/frames/",
+            data={"name": "valide"},
+            files={"file": ("cadre.png", _png(400, 300), "image/png")}
+        )
+
+        assert response.status_code == 200
+        frame = response.json()["frame"]
+        assert (frame["width"], frame["height"]) == (400, 300)
+        assert (frames.FRAMES_DIR / frame["filename"]).exists()
@@ -0,0 +1,135 @@
+import asyncio
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+from app.routes import email, printing
+
+
+@pytest.fixture
+def print_attempts(monkeypatch):
+    """Compteurs d'impression vides, isolés de l'état global du module"""
+    attempts = OrderedDict()
+    monkeypatch.setattr(printing, "print_attempts", attempts)
+    return attempts
+
+
+@pytest.fixture
+def email_clock(monkeypatch):
+    """Compteurs d'email vides et horloge monotone contrôlée par le test"""
+    monkeypatch.setattr(email, "email_attempts", OrderedDict())
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(email.time, "monotonic", lambda: clock.now)
+    return clock
+
+
+def _request(ip: str):
+    """Requête minimale portant l'adresse du client"""
+    return SimpleNamespace(client=SimpleNamespace(host=ip))
+
+
+class TestPrintRateLimit:
+    """Tests de la fenêtre glissante du rate limiting d'impression"""
+
+    # Début d'une fenêtre quelconque (instant contrôlé, indépendant de l'horloge)
+    START = 1000 * printing.print_rate_window
+
+    def test_admits_up_to_limit_then_rejects(self, print_attempts):
+        """Test de l'admission jusqu'à la limite puis du refus"""
+        for _ in range(printing.print_rate_limit):
+            assert printing.sliding_window_admit("10.0.0.1", self.START)
+
+        assert not printing.sliding_window_admit("10.0.0.1", self.START + 1)
+        # Une autre IP n'est pas affectée
+        assert printing.sliding_window_admit("10.0.0.2", self.START + 1)
+
+    def test_partial_rollover_weights_previous_window(self, print_attempts):
+        """Test de la pondération de la fenêtre précédente au milieu de la suivante"""
+        for _ in range(printing.print_rate_limit):
+            assert printing.sliding_window_admit("10.0.0.1", self.START)
+
+        # A mi-fenêtre, la fenêtre précédente pèse 5 * 0.5 = 2.5: trois requêtes passent
+        halfway = self.START + 1.5 * printing.print_rate_window
+        admitted = [printing.sliding_window_admit("10.0.0.1", halfway) for _ in range(printing.print_rate_limit)]
+        assert admitted == [True, True, True, False, False]
+
+    def test_full_reset_after_two_windows(self, print_attempts):
+        """Test de la remise à zéro complète après deux fenêtres"""
+        for _ in range(printing.print_rate_limit):
+            assert printing.sliding_window_admit("10.0.0.1", self.START)
+        assert not printing.sliding_window_admit("10.0.0.1", self.START)
+
+        later = self.START + 2 * printing.print_rate_window
+        for _ in range(printing.print_rate_limit):
+            assert printing.sliding_window_admit("10.0.0.1", later)
+        assert not printing.sliding_window_admit("10.0.0.1", later)
+
+    def test_evicts_least_recent_client_at_cap(self, print_attempts):
+        """Test de l'éviction de l'IP la moins récente au-delà de print_rate_max_clients"""
+        for i in range(printing.print_rate_max_clients):
+            printing.sliding_window_admit(f"ip-{i}", self.START)
+        assert len(print_attempts) == printing.print_rate_max_clients
+
+        # "ip-0" redevient la plus récente: c'est "ip-1" qui doit être évincée
+        printing.sliding_window_admit("ip-0", self.START)
+        printing.sliding_window_admit("nouvelle-ip", self.START)
+
+        assert len(print_attempts) == printing.print_rate_max_clients
+        assert "ip-0" in print_attempts
+        assert "ip-1" not in print_attempts
+        assert "nouvelle-ip" in print_attempts
+
+
+class TestEmailRateLimit:
+    """Tests de la fenêtre fixe du rate limiting d'envoi d'email"""
+
+    def test_rejects_at_limit(self, email_clock):
+        """Test du refus une fois la limite atteinte dans la fenêtre"""
+        for _ in range(email.email_rate_limit):
+            assert email.check_email_rate_limit(_request("10.0.0.1"))
+
+        email_clock.now += email.email_rate_window - 1
+        assert not email.check_email_rate_limit(_request("10.0.0.1"))
+        assert email.check_email_rate_limit(_request("10.0.0.2"))
+
+    def test_window_resets_on_monotonic_clock(self, email_clock):
+        """Test de la remise à zéro de la fenêtre selon l'horloge monotone"""
+        for _ in range(email.email_rate_limit):
+            assert email.check_email_rate_limit(_request("10.0.0.1"))
+        assert not email.check_email_rate_limit(_request("10.0.0.1"))
+
+        email_clock.now += email.email_rate_window
+        for _ in range(email.email_rate_limit):
+            assert email.check_email_rate_limit(_request("10.0.0.1"))
+        assert not email.check_email_rate_limit(_request("10.0.0.1"))
+
+    def test_evicts_least_recent_client_at_cap(self, email_clock):
+        """Test de l'éviction de l'IP la moins récente au-delà de email_rate_max_clients"""
+        for i in range(email.email_rate_max_clients):
+            email.check_email_rate_limit(_request(f"ip-{i}"))
+        assert len(email.email_attempts) == email.email_rate_max_clients
+
+        # "ip-0" redevient la plus récente: c'est "ip-1" qui doit être évincée
+        email.check_email_rate_limit(_request("ip-0"))
+        email.check_email_rate_limit(_request("nouvelle-ip"))
+
+        assert len(email.email_attempts) == email.email_rate_max_clients
+        assert "ip-0" in email.email_attempts
+        assert "ip-1" not in email.email_attempts
+        assert "nouvelle-ip" in email.email_attempts
+
+
+class TestPrintQueue:
+    """Tests de la file d'impression saturée"""
+
+    def test_full_queue_returns_503_with_retry_after(self, client, print_attempts, monkeypatch):
+        """Test du 503 avec Retry-After quand aucune place ne se libère à temps"""
+        # Aucune place disponible et attente très courte
+        monkeypatch.setattr(printing, "print_semaphore", asyncio.Semaphore(0))
+        monkeypatch.setattr(printing, "print_queue_timeout", 0.01)
+
+        response = client.post("/print/photo", json={"photo_path": "uploads/photo.jpg"})
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
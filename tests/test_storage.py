@@ -0,0 +1,146 @@
+import os
+import time
+
+import pytest
+
+from app.storage import files
+from app.storage.files import FileStorage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """Gestionnaire de stockage travaillant dans un dossier d'upload temporaire"""
+    file_storage = FileStorage()
+    file_storage.upload_dir = tmp_path / "uploads"
+    file_storage.upload_dir.mkdir()
+    return file_storage
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Fichier source hors du dossier d'upload, plus grand qu'un bloc de copie"""
+    source_path = tmp_path / "source.jpg"
+    source_path.write_bytes(os.urandom(2 * files.COPY_BUFFER_SIZE + 123))
+    return source_path
+
+
+class TestCopyContents:
+    """Tests de la copie des fichiers sauvegardés"""
+
+    def test_copy_matches_source(self, storage, source):
+        """Test de la copie identique octet par octet (sendfile si disponible)"""
+        target = storage.save_file(source, "photo.jpg")
+
+        assert target is not None
+        assert target.read_bytes() == source.read_bytes()
+
+    def test_copy_without_sendfile_matches_source(self, storage, source, monkeypatch):
+        """Test de la copie par blocs quand sendfile n'est pas disponible"""
+        monkeypatch.delattr(files.os, "sendfile", raising=False)
+
+        target = storage.save_file(source, "photo.jpg")
+
+        assert target is not None
+        assert target.read_bytes() == source.read_bytes()
+
+    def test_short_sendfile_fails_instead_of_truncating(self, storage, source, monkeypatch):
+        """Test du refus d'une copie tronquée (sendfile renvoie 0 avant la fin)"""
+        if not hasattr(os, "sendfile"):
+            pytest.skip("os.sendfile non disponible")
+        real_sendfile = os.sendfile
+
+        def short_sendfile(out_fd, in_fd, offset, count):
+            # Simule une source raccourcie après le premier bloc
+            return real_sendfile(out_fd, in_fd, offset, min(count, 1024)) if offset == 0 else 0
+        monkeypatch.setattr(files.os, "sendfile", short_sendfile)
+
+        assert storage.save_file(source, "photo.jpg") is None
+        assert list(storage.upload_dir.iterdir()) == []
+
+
+class TestUniqueFileNames:
+    """Tests de la création atomique de noms de fichiers uniques"""
+
+    def test_collision_adds_random_suffix(self, storage):
+        """Test de l'ajout d'un suffixe quand le nom est déjà pris"""
+        (storage.upload_dir / "photo.jpg").write_bytes(b"existant")
+
+        target_path, fd = storage._open_unique_file("photo.jpg")
+        os.close(fd)
+
+        assert target_path.parent == storage.upload_dir
+        assert target_path.name != "photo.jpg"
+        assert target_path.name.startswith("photo_") and target_path.suffix == ".jpg"
+        assert (storage.upload_dir / "photo.jpg").read_bytes() == b"existant"
+
+    def test_raises_when_attempts_are_exhausted(self, storage, monkeypatch):
+        """Test de l'erreur quand aucun nom libre n'est trouvé"""
+        monkeypatch.setattr(files.os, "urandom", lambda size: b"\0" * size)
+        (storage.upload_dir / "photo.jpg").write_bytes(b"")
+        (storage.upload_dir / "photo_000000.jpg").write_bytes(b"")
+
+        with pytest.raises(FileExistsError):
+            storage._open_unique_file("photo.jpg")
+        assert sorted(path.name for path in storage.upload_dir.iterdir()) == ["photo.jpg", "photo_000000.jpg"]
+
+
+def _touch(path, age_days: float, content: bytes = b"x"):
+    """Crée un fichier dont la date de modification remonte à age_days jours"""
+    path.write_bytes(content)
+    mtime = time.time() - age_days * 24 * 3600
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+class TestCleanupOldFiles:
+    """Tests du nettoyage des anciens fichiers"""
+
+    def test_removes_only_files_past_age_limit(self, storage):
+        """Test de la suppression des seuls fichiers plus vieux que la limite"""
+        _touch(storage.upload_dir / "ancien.jpg", 40)
+        _touch(storage.upload_dir / "moins_ancien.jpg", 31)
+        _touch(storage.upload_dir / "recent.jpg", 29)
+        _touch(storage.upload_dir / "nouveau.jpg", 0)
+
+        assert storage.cleanup_old_files(max_age_days=30) == 2
+        assert sorted(path.name for path in storage.upload_dir.iterdir()) == ["nouveau.jpg", "recent.jpg"]
+
+    def test_stops_at_first_file_too_new(self, storage, monkeypatch):
+        """Test de l'arrêt du parcours au premier fichier trop récent"""
+        old = _touch(storage.upload_dir / "ancien.jpg", 40)
+        young = _touch(storage.upload_dir / "recent.jpg", 1)
+        after = _touch(storage.upload_dir / "apres.jpg", 50)
+        # Scan imposé: le parcours (inversé) rencontre "recent.jpg" avant "apres.jpg",
+        # qui ne doit donc pas être supprimé malgré son âge
+        entries = [(after, after.stat()), (young, young.stat()), (old, old.stat())]
+        monkeypatch.setattr(storage, "_scan_files", lambda: entries)
+
+        assert storage.cleanup_old_files(max_age_days=30) == 1
+        assert not old.exists()
+        assert young.exists() and after.exists()
+
+
+class TestScanCache:
+    """Tests du cache des noms de fichiers du dossier d'upload"""
+
+    def test_refreshed_when_directory_mtime_changes(self, storage):
+        """Test du rechargement des noms quand le mtime du dossier change"""
+        _touch(storage.upload_dir / "a.jpg", 0)
+        assert [path.name for path in storage.list_files()] == ["a.jpg"]
+        dir_stat = storage.upload_dir.stat()
+
+        # Mtime du dossier inchangé: la liste des noms en cache est réutilisée
+        _touch(storage.upload_dir / "b.jpg", 1)
+        os.utime(storage.upload_dir, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+        assert [path.name for path in storage.list_files()] == ["a.jpg"]
+
+        os.utime(storage.upload_dir, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns + 1_000_000_000))
+        assert [path.name for path in storage.list_files()] == ["a.jpg", "b.jpg"]
+
+    def test_rewritten_file_reports_current_size(self, storage):
+        """Test de la taille à jour d'un fichier réécrit sur place (stat à chaque scan)"""
+        path = _touch(storage.upload_dir / "a.jpg", 0, b"x" * 10)
+        assert storage.get_storage_stats()["total_size"] == 10
+
+        path.write_bytes(b"x" * 50)
+        assert storage.get_storage_stats()["total_size"] == 50
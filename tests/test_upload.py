@@ -0,0 +1,49 @@
+import pytest
+
+from app.config import config_manager
+from app.routes import upload
+
+# Taille maximale réduite pour les tests (minimum accepté par la configuration)
+MAX_FILE_SIZE = 1024
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+@pytest.fixture
+def uploads_dir(tmp_path, monkeypatch):
+    """Dossier d'upload temporaire et taille maximale réduite"""
+    monkeypatch.setattr(upload, "UPLOADS_DIR", tmp_path)
+    monkeypatch.setattr(config_manager.config.storage, "max_file_size", MAX_FILE_SIZE)
+    return tmp_path
+
+
+def _post_photo(client, size: int):
+    """Envoie une image PNG de la taille demandée"""
+    content = PNG_SIGNATURE + b"\0" * (size - len(PNG_SIGNATURE))
+    return client.post("/upload/photo", files={"photo": ("photo.png", content, "image/png")})
+
+
+class TestUploadSizeLimit:
+    """Tests du refus des uploads trop volumineux"""
+
+    def test_rejects_announced_content_length(self, client, uploads_dir):
+        """Test du refus sur Content-Length au-delà de la limite plus la marge multipart"""
+        response = _post_photo(client, MAX_FILE_SIZE + upload.MULTIPART_OVERHEAD + 1)
+
+        assert response.status_code == 413
+        assert list(uploads_dir.iterdir()) == []
+
+    def test_rejects_streamed_bytes_and_removes_temp_file(self, client, uploads_dir):
+        """Test de l'arrêt en cours d'écriture et de la suppression du fichier temporaire"""
+        # Content-Length reste sous la marge: seul le décompte des octets reçus détecte le dépassement
+        response = _post_photo(client, MAX_FILE_SIZE + 1)
+
+        assert response.status_code == 413
+        assert list(uploads_dir.iterdir()) == []
+
+    def test_accepts_file_at_limit(self, client, uploads_dir):
+        """Test de l'acceptation d'un fichier à la taille maximale"""
+        response = _post_photo(client, MAX_FILE_SIZE)
+
+        assert response.status_code == 200
+        assert [path.name for path in uploads_dir.iterdir()] == [response.json()["filename"]]